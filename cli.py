@@ -5,6 +5,7 @@ import pandas as pd
 from loguru import logger
 from config import Settings, TradingConfig
 from utils.logger import setup_logger
+from utils.event_loop import install_uvloop
 import traceback
 
 # Настройка логирования
@@ -14,7 +15,7 @@ setup_logger()
 @click.group()
 def cli():
     """Crypto AI Trader CLI - Обновленная версия с реальными данными"""
-    pass
+    install_uvloop()
 
 
 @cli.command()
@@ -131,6 +131,7 @@ class FundManager:
             # Добавление в общий фонд
             self.fund_portfolio.assets['USDT'].free += net_deposit
             self.fund_portfolio.assets['USDT'].total += net_deposit
+            self.fund_portfolio.invalidate_stats()
 
             # Регистрация депозита
             self.client_deposits[deposit.id] = deposit
@@ -467,6 +468,7 @@ class FundManager:
                         # Уменьшение баланса клиента
                         portfolio.assets['USDT'].free -= total_client_fees
                         portfolio.assets['USDT'].total -= total_client_fees
+                        portfolio.invalidate_stats()
 
                         # Добавление к общим комиссиям
                         deposit.total_fees_paid += total_client_fees
@@ -520,10 +522,12 @@ class FundManager:
             # Обновление портфеля
             portfolio.assets['USDT'].free -= withdrawal_amount
             portfolio.assets['USDT'].total -= withdrawal_amount
+            portfolio.invalidate_stats()
 
             # Обновление общего фонда
             self.fund_portfolio.assets['USDT'].free -= withdrawal_amount
             self.fund_portfolio.assets['USDT'].total -= withdrawal_amount
+            self.fund_portfolio.invalidate_stats()
             self.total_aum -= withdrawal_amount
 
             logger.info(f"💸 Вывод средств {deposit.client_name}: ${withdrawal_amount} (комиссия: ${exit_fee})")
@@ -552,7 +556,8 @@ class FundManager:
         try:
             portfolio = self.client_portfolios[deposit_id]
 
-            for position_id, position in portfolio.positions.items():
+            # Снимок позиций: close_position удаляет их из словаря
+            for position_id, position in tuple(portfolio.positions.items()):
                 # Закрытие позиции по рыночной цене
                 await portfolio.close_position(position_id, position.entry_price * Decimal("1.01"))  # Примерная цена
 
@@ -9,6 +9,12 @@ class RiskConfig(BaseModel):
     stop_loss_percent: float = 2.0          # % стоп-лосс
     take_profit_percent: float = 4.0        # % тейк-профит
 
+    # Келли с поправкой на издержки и волатильность (доля от max_position_size_percent)
+    sigma_forecast: float = 0.04            # Прогноз дневной волатильности
+    sigma_target: float = 0.04              # Целевая дневная волатильность (множитель 1 при прогнозе = цели)
+    max_vol_weight: float = 2.0             # Максимальный множитель по волатильности
+    trading_cost_bps: float = 10.0          # Издержки на сделку (комиссия + проскальзывание), б.п.
+
 class TradingPair(BaseModel):
     symbol: str
     min_quantity: Decimal
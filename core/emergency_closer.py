@@ -272,7 +272,7 @@ class EmergencyPositionCloser:
                             logger.info(f"✅ Уменьшена позиция {position.id} на {reduction_percent}%")
                     else:
                         # Программное уменьшение
-                        position.quantity -= reduction_quantity
+                        self.portfolio.reduce_position(position, reduction_quantity)
                         results['successfully_reduced'] += 1
                         logger.info(f"✅ Программно уменьшена позиция {position.id}")
 
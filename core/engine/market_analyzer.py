@@ -4,6 +4,7 @@
 """
 import pandas as pd
 from typing import Dict, Optional
+from datetime import datetime
 from loguru import logger
 
 from config.trading_config import TradingConfig
@@ -67,19 +68,20 @@ class MarketAnalyzer:
             self.analysis_cache[symbol] = {
                 'market_data': processed_data,
                 'ai_analysis': ai_analysis,
-                'timestamp': pd.Timestamp.now()
+                'timestamp': datetime.utcnow()
             }
 
-            # 5. Публикация события с результатами анализа
-            await self.event_bus.publish(Event(
-                type=EventType.AI_ANALYSIS_COMPLETE,
-                data={
-                    'symbol': symbol,
-                    'analysis': ai_analysis,
-                    'technical_data': processed_data.tail(1).to_dict('records')[0] if not processed_data.empty else {}
-                },
-                source="MarketAnalyzer"
-            ))
+            # 5. Публикация события с результатами анализа (только при наличии подписчиков)
+            if self.event_bus.has_subscribers(EventType.AI_ANALYSIS_COMPLETE):
+                await self.event_bus.publish(Event(
+                    type=EventType.AI_ANALYSIS_COMPLETE,
+                    data={
+                        'symbol': symbol,
+                        'analysis': ai_analysis,
+                        'technical_data': processed_data.tail(1).to_dict('records')[0] if not processed_data.empty else {}
+                    },
+                    source="MarketAnalyzer"
+                ))
 
             logger.debug(f"📊 Анализ {symbol} завершен: {ai_analysis.get('action', 'HOLD')}")
 
@@ -8,6 +8,7 @@ from loguru import logger
 from config.settings import Settings
 from core.event_bus import EventBus, Event, EventType
 from notifications.telegram_bot import TelegramBot
+from utils.helpers import format_duration_ms
 
 
 class NotificationManager:
@@ -133,13 +134,14 @@ class NotificationManager:
         pnl_percent = data.get('pnl_percent', 0)
 
         emoji = "🟢" if pnl > 0 else "🔴" if pnl < 0 else "⚪"
+        duration = format_duration_ms(data['duration_ms']) if 'duration_ms' in data else 'N/A'
 
         message = f"""
 {emoji} <b>Позиция закрыта</b>
 
 Символ: <b>{data.get('symbol', 'N/A')}</b>
 PnL: <code>${pnl:+.2f} ({pnl_percent:+.2f}%)</code>
-Длительность: {data.get('duration', 'N/A')}
+Длительность: {duration}
 Стратегия: <i>{data.get('strategy', 'N/A')}</i>
 """
 
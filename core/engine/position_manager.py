@@ -2,7 +2,11 @@
 """
 Управление позициями и их жизненным циклом
 """
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Mapping, Optional
+from types import MappingProxyType
+from collections import defaultdict
+from dataclasses import dataclass
+import itertools
 from decimal import Decimal
 from loguru import logger
 from datetime import datetime
@@ -10,6 +14,32 @@ import asyncio
 
 from core.event_bus import EventBus, Event, EventType
 from core.portfolio import Portfolio, Position
+from utils.helpers import to_decimal
+
+
+# Параметры пакетной обработки исполненных ордеров
+FILL_QUEUE_SIZE = 1024
+FILL_BATCH_SIZE = 64
+FILL_BATCH_MAX_WAIT = 0.005  # секунды ожидания добора пакета
+_FILL_STOP = object()  # Маркер остановки обработчика буфера
+
+# Эмуляция цены закрытия (до подключения exchange_manager)
+_FORCE_CLOSE_SLIPPAGE = Decimal("1.01")  # +1% при принудительном закрытии
+_EMERG_SLIPPAGE = Decimal("1.001")  # +0.1% при экстренном закрытии
+
+# Сочетания (сторона позиции, действие сигнала), требующие разворота
+_REVERSE = frozenset({('long', 'sell'), ('short', 'buy')})
+
+# Общий неизменяемый пустой словарь вместо нового {} на каждую позицию
+_EMPTY_METADATA: Mapping = MappingProxyType({})
+
+
+@dataclass(slots=True)
+class PositionMeta:
+    """Метаданные отслеживаемой позиции"""
+    strategy: str
+    signal_metadata: Mapping
+    entry_time: datetime
 
 
 class PositionManager:
@@ -18,7 +48,26 @@ class PositionManager:
     def __init__(self, portfolio: Portfolio, event_bus: EventBus):
         self.portfolio = portfolio
         self.event_bus = event_bus
-        self.position_trackers = {}  # Отслеживание метаданных позиций
+        self.position_trackers: Dict[str, PositionMeta] = {}  # Отслеживание метаданных позиций
+        self._pos_seq = itertools.count()  # Уникальные номера позиций
+
+        # Статистика по стратегиям, обновляется при открытии/закрытии
+        self._strategy_stats: Dict[str, Dict] = defaultdict(lambda: {'count': 0, 'total_value': 0.0})
+
+        # Внутренние подписчики на открытие/закрытие позиций - вызываются
+        # синхронно, минуя EventBus (шина остается для внешних подписчиков)
+        self._internal_on_opened: List[Callable[[Dict], None]] = [
+            self._update_stats_on_opened,
+            self._log_position_opened
+        ]
+        self._internal_on_closed: List[Callable[[Dict], None]] = [
+            self._update_stats_on_closed,
+            self._log_position_closed
+        ]
+
+        # Буфер исполненных ордеров для пакетной обработки
+        self._fill_queue: asyncio.Queue = asyncio.Queue(maxsize=FILL_QUEUE_SIZE)
+        self._fill_consumer_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
         """Инициализация менеджера позиций"""
@@ -28,6 +77,8 @@ class PositionManager:
         self.event_bus.subscribe(EventType.SIGNAL_GENERATED, self._on_signal_generated)
         self.event_bus.subscribe(EventType.ORDER_FILLED, self._on_order_filled)
 
+        self._fill_consumer_task = asyncio.create_task(self._fill_consumer())
+
         await self.setup_position_monitoring()
 
     async def _on_signal_generated(self, event: Event):
@@ -39,18 +90,70 @@ class PositionManager:
             await self._process_entry_signal(data)
 
     async def _on_order_filled(self, event: Event):
-        """Обработка исполненного ордера"""
-        data = event.data
-
+        """Обработка исполненного ордера - постановка в буфер"""
         try:
-            # Определяем, открывается или закрывается позиция
-            if await self._is_opening_position(data):
-                await self._handle_position_opening(data)
-            else:
-                await self._handle_position_closing(data)
+            self._fill_queue.put_nowait(event.data)
+        except asyncio.QueueFull:
+            # Буфер переполнен - притормаживаем издателя
+            await self._fill_queue.put(event.data)
+
+    async def _fill_consumer(self):
+        """Фоновая обработка исполненных ордеров пакетами"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await self._fill_queue.get()
+            if item is _FILL_STOP:
+                self._fill_queue.task_done()
+                return
 
-        except Exception as e:
-            logger.error(f"❌ Ошибка обработки исполненного ордера: {e}")
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + FILL_BATCH_MAX_WAIT
+
+            # Добираем пакет до FILL_BATCH_SIZE или до истечения ожидания
+            while len(batch) < FILL_BATCH_SIZE:
+                try:
+                    item = self._fill_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._fill_queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+                if item is _FILL_STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await self._process_fill_batch(batch)
+            finally:
+                for _ in range(len(batch) + stopping):
+                    self._fill_queue.task_done()
+
+            # Остановка только после обработки уже собранного пакета
+            if stopping:
+                return
+
+    async def _process_fill_batch(self, batch: List[Dict]):
+        """Обработка пакета исполненных ордеров"""
+
+        for data in batch:
+            try:
+                position = self.portfolio.get_position_by_symbol(data['symbol'])
+
+                # Определяем, открывается или закрывается позиция
+                if position is None:
+                    await self._handle_position_opening(data)
+                else:
+                    await self._handle_position_closing(data, position)
+
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработки исполненного ордера: {e}")
 
     async def _process_entry_signal(self, signal_data: Dict):
         """Обработка сигнала на открытие позиции"""
@@ -59,7 +162,7 @@ class PositionManager:
         action = signal_data['action']
 
         # Проверяем, есть ли уже позиция по этому символу
-        existing_position = await self._get_position_by_symbol(symbol)
+        existing_position = self.portfolio.get_position_by_symbol(symbol)
 
         if existing_position:
             # Проверяем, нужно ли закрыть существующую позицию
@@ -86,43 +189,22 @@ class PositionManager:
     def _should_reverse_position(self, position: Position, new_action: str) -> bool:
         """Проверка необходимости разворота позиции"""
 
-        current_side = position.side
-
         # Разворот если противоположные направления
-        if current_side == 'long' and new_action == 'sell':
-            return True
-        elif current_side == 'short' and new_action == 'buy':
-            return True
-
-        return False
-
-    async def _get_position_by_symbol(self, symbol: str) -> Optional[Position]:
-        """Получение позиции по символу"""
-
-        for position in self.portfolio.positions.values():
-            if position.symbol == symbol:
-                return position
-        return None
-
-    async def _is_opening_position(self, order_data: Dict) -> bool:
-        """Определение, открывается ли новая позиция"""
-
-        symbol = order_data['symbol']
-        existing_position = await self._get_position_by_symbol(symbol)
-
-        return existing_position is None
+        return (position.side, new_action) in _REVERSE
 
-    async def _handle_position_opening(self, order_data: Dict):
+    async def _handle_position_opening(self, order_data: Dict) -> Optional[Position]:
         """Обработка открытия позиции"""
 
+        now = datetime.utcnow()
+
         try:
             symbol = order_data['symbol']
             side = order_data['side']
-            price = Decimal(str(order_data['price']))
-            quantity = Decimal(str(order_data['quantity']))
+            price = to_decimal(order_data['price'])
+            quantity = to_decimal(order_data['quantity'])
 
             # Создание новой позиции
-            position_id = f"pos_{symbol}_{datetime.utcnow().timestamp()}"
+            position_id = f"pos_{symbol}_{next(self._pos_seq)}"
 
             position = Position(
                 id=position_id,
@@ -130,163 +212,222 @@ class PositionManager:
                 side='long' if side == 'buy' else 'short',
                 entry_price=price,
                 quantity=quantity,
-                opened_at=datetime.utcnow()
+                opened_at=now
             )
 
             # Добавление в портфель
             success = await self.portfolio.open_position(position)
 
             if success:
+                strategy = order_data.get('strategy', 'unknown')
+
                 # Добавление метаданных
-                self.position_trackers[position_id] = {
-                    'strategy': order_data.get('strategy', 'unknown'),
-                    'signal_metadata': order_data.get('signal_metadata', {}),
-                    'entry_time': datetime.utcnow()
-                }
+                self._track_position(position, strategy, order_data.get('signal_metadata') or _EMPTY_METADATA, now)
 
                 # Публикация события
-                await self.event_bus.publish(Event(
-                    type=EventType.POSITION_OPENED,
-                    data={
-                        'position_id': position_id,
-                        'symbol': symbol,
-                        'side': position.side,
-                        'entry_price': float(price),
-                        'quantity': float(quantity),
-                        'strategy': order_data.get('strategy')
-                    },
-                    source="PositionManager"
-                ))
-
-                logger.info(f"🟢 Открыта позиция {symbol}: {position.side} @ ${price}")
+                self._dispatch_position_event(EventType.POSITION_OPENED, {
+                    'position_id': position_id,
+                    'symbol': symbol,
+                    'side': position.side,
+                    'entry_price': position.entry_price_float,
+                    'quantity': position.quantity_float,
+                    'strategy': strategy
+                })
+
+                return position
             else:
                 logger.error(f"❌ Не удалось открыть позицию {symbol}")
 
         except Exception as e:
             logger.error(f"❌ Ошибка открытия позиции: {e}")
 
-    async def _handle_position_closing(self, order_data: Dict):
+        return None
+
+    async def _handle_position_closing(self, order_data: Dict, position: Position):
         """Обработка закрытия позиции"""
 
+        now = datetime.utcnow()
+
         try:
             symbol = order_data['symbol']
-            close_price = Decimal(str(order_data['price']))
-
-            # Находим позицию для закрытия
-            position = await self._get_position_by_symbol(symbol)
-
-            if not position:
-                logger.warning(f"⚠️ Позиция для закрытия {symbol} не найдена")
-                return
+            close_price = to_decimal(order_data['price'])
 
             # Закрытие позиции
             closed_position = await self.portfolio.close_position(position.id, close_price)
 
             if closed_position:
-                # Получение метаданных
-                metadata = self.position_trackers.get(position.id, {})
-
-                # Публикация события
-                await self.event_bus.publish(Event(
-                    type=EventType.POSITION_CLOSED,
-                    data={
-                        'position_id': position.id,
-                        'symbol': symbol,
-                        'pnl': float(closed_position.pnl),
-                        'pnl_percent': float(closed_position.pnl_percent),
-                        'duration': str(datetime.utcnow() - position.opened_at),
-                        'strategy': metadata.get('strategy', 'unknown'),
-                        'entry_price': float(position.entry_price),
-                        'exit_price': float(close_price)
-                    },
-                    source="PositionManager"
-                ))
+                pnl = float(closed_position.pnl)
 
-                # Очистка метаданных
-                if position.id in self.position_trackers:
-                    del self.position_trackers[position.id]
+                # Получение и очистка метаданных
+                strategy = self._untrack_position(position)
 
-                pnl_emoji = "🟢" if closed_position.pnl > 0 else "🔴" if closed_position.pnl < 0 else "⚪"
-                logger.info(f"{pnl_emoji} Закрыта позиция {symbol}: PnL = ${closed_position.pnl:.2f}")
+                # Публикация события
+                self._dispatch_position_event(EventType.POSITION_CLOSED, {
+                    'position_id': position.id,
+                    'symbol': symbol,
+                    'pnl': pnl,
+                    'pnl_percent': float(closed_position.pnl_percent),
+                    'duration_ms': int((now - position.opened_at).total_seconds() * 1000),
+                    'strategy': strategy,
+                    'entry_price': position.entry_price_float,
+                    'exit_price': float(close_price),
+                    'quantity': position.quantity_float
+                })
             else:
                 logger.error(f"❌ Не удалось закрыть позицию {symbol}")
 
         except Exception as e:
             logger.error(f"❌ Ошибка закрытия позиции: {e}")
 
-    async def _close_position(self, position: Position, reason: str = "manual"):
+    async def _close_position(self, position: Position, reason: str = "manual") -> bool:
         """Принудительное закрытие позиции"""
 
+        now = datetime.utcnow()
+
         try:
             # Здесь должен быть вызов к exchange_manager для размещения ордера на закрытие
             # В упрощенной версии эмулируем закрытие
 
             # Получаем текущую цену (заглушка)
-            current_price = position.entry_price * Decimal("1.01")  # +1% для примера
+            current_price = position.entry_price * _FORCE_CLOSE_SLIPPAGE
 
             closed_position = await self.portfolio.close_position(position.id, current_price)
 
             if closed_position:
+                strategy = self._untrack_position(position)
+
                 # Публикация события
-                await self.event_bus.publish(Event(
-                    type=EventType.POSITION_CLOSED,
-                    data={
-                        'position_id': position.id,
-                        'symbol': position.symbol,
-                        'pnl': float(closed_position.pnl),
-                        'pnl_percent': float(closed_position.pnl_percent),
-                        'reason': reason,
-                        'duration': str(datetime.utcnow() - position.opened_at)
-                    },
-                    source="PositionManager"
-                ))
-
-                logger.info(f"✅ Принудительно закрыта позиция {position.symbol}: {reason}")
+                self._dispatch_position_event(EventType.POSITION_CLOSED, {
+                    'position_id': position.id,
+                    'symbol': position.symbol,
+                    'pnl': float(closed_position.pnl),
+                    'pnl_percent': float(closed_position.pnl_percent),
+                    'reason': reason,
+                    'duration_ms': int((now - position.opened_at).total_seconds() * 1000),
+                    'strategy': strategy,
+                    'entry_price': position.entry_price_float,
+                    'exit_price': float(current_price),
+                    'quantity': position.quantity_float
+                })
+
+                return True
 
         except Exception as e:
             logger.error(f"❌ Ошибка принудительного закрытия позиции: {e}")
 
+        return False
+
     async def get_position_statistics(self) -> Dict:
         """Получение статистики по позициям"""
 
         open_positions = len(self.portfolio.positions)
+        # PnL обновляется извне (risk monitors), поэтому считаем по факту
         total_pnl = sum(float(pos.pnl) for pos in self.portfolio.positions.values())
 
-        # Статистика по стратегиям
-        strategy_stats = {}
-        for pos_id, metadata in self.position_trackers.items():
-            strategy = metadata.get('strategy', 'unknown')
-            if strategy not in strategy_stats:
-                strategy_stats[strategy] = {'count': 0, 'total_value': 0}
-
-            position = self.portfolio.positions.get(pos_id)
-            if position:
-                strategy_stats[strategy]['count'] += 1
-                strategy_stats[strategy]['total_value'] += float(position.entry_price * position.quantity)
-
         return {
             'open_positions': open_positions,
             'total_unrealized_pnl': total_pnl,
-            'strategy_breakdown': strategy_stats
+            'strategy_breakdown': {
+                strategy: dict(stats) for strategy, stats in self._strategy_stats.items()
+            }
         }
 
+    def _track_position(self, position: Position, strategy: str, signal_metadata: Mapping, entry_time: datetime):
+        """Регистрация метаданных позиции"""
+        self.position_trackers[position.id] = PositionMeta(
+            strategy=strategy,
+            signal_metadata=signal_metadata,
+            entry_time=entry_time
+        )
+
+    def _untrack_position(self, position: Position) -> str:
+        """Удаление метаданных позиции, возвращает стратегию позиции"""
+        meta = self.position_trackers.pop(position.id, None)
+        return meta.strategy if meta else 'unknown'
+
+    def add_position_listener(self, on_opened: Optional[Callable[[Dict], None]] = None,
+                              on_closed: Optional[Callable[[Dict], None]] = None):
+        """Регистрация внутреннего синхронного обработчика открытия/закрытия позиций"""
+        if on_opened:
+            self._internal_on_opened.append(on_opened)
+        if on_closed:
+            self._internal_on_closed.append(on_closed)
+
+    def _dispatch_position_event(self, event_type: EventType, data: Dict):
+        """Рассылка события позиции: внутренним обработчикам напрямую, внешним - через EventBus"""
+        callbacks = self._internal_on_opened if event_type == EventType.POSITION_OPENED else self._internal_on_closed
+
+        for callback in callbacks:
+            try:
+                callback(data)
+            except Exception as e:
+                logger.error(f"❌ Ошибка во внутреннем обработчике {callback.__name__}: {e}")
+
+        # Публикация без ожидания - обработчик исполнения не ждет шину
+        if self.event_bus.has_subscribers(event_type):
+            self.event_bus.publish_nowait(Event(type=event_type, data=data, source="PositionManager"))
+
+    def _update_stats_on_opened(self, data: Dict):
+        """Учет открытой позиции в статистике стратегий"""
+        stats = self._strategy_stats[data['strategy']]
+        stats['count'] += 1
+        stats['total_value'] += data['entry_price'] * data['quantity']
+
+    def _update_stats_on_closed(self, data: Dict):
+        """Учет закрытой позиции в статистике стратегий"""
+        strategy = data['strategy']
+        stats = self._strategy_stats.get(strategy)
+        if stats is None:
+            return
+
+        stats['count'] -= 1
+        stats['total_value'] -= data['entry_price'] * data['quantity']
+
+        if stats['count'] <= 0:
+            del self._strategy_stats[strategy]
+
+    def _log_position_opened(self, data: Dict):
+        """Лог открытия позиции"""
+        # Форматирование выполняется только если уровень INFO не отфильтрован
+        logger.info("🟢 Открыта позиция {symbol}: {side} @ ${entry_price}", **data)
+
+    def _log_position_closed(self, data: Dict):
+        """Лог закрытия позиции"""
+        logger.opt(lazy=True).info(
+            "{emoji} Закрыта позиция {symbol}: PnL = ${pnl:.2f}{reason}",
+            emoji=lambda: "🟢" if data['pnl'] > 0 else "🔴" if data['pnl'] < 0 else "⚪",
+            symbol=lambda: data['symbol'],
+            pnl=lambda: data['pnl'],
+            reason=lambda: f" ({data['reason']})" if 'reason' in data else ""
+        )
+
     async def close_all_positions(self, reason: str = "emergency_close"):
         """Экстренное закрытие всех позиций"""
 
         logger.warning(f"⚠️ Экстренное закрытие всех позиций: {reason}")
 
-        positions_to_close = list(self.portfolio.positions.values())
+        positions_to_close = tuple(self.portfolio.positions.values())
+
+        # Закрываем все позиции параллельно
+        close_results = await asyncio.gather(
+            *(self._close_position(position, reason) for position in positions_to_close),
+            return_exceptions=True
+        )
 
-        for position in positions_to_close:
-            await self._close_position(position, reason)
+        closed_count = 0
+        for position, result in zip(positions_to_close, close_results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Ошибка закрытия позиции {position.id}: {result}")
+            elif result:
+                closed_count += 1
 
-        logger.info(f"✅ Закрыто позиций: {len(positions_to_close)}")
+        logger.info(f"✅ Закрыто позиций: {closed_count} из {len(positions_to_close)}")
 
     async def emergency_close_all_positions(self, reason: str = "Emergency stop"):
         """Экстренное закрытие всех позиций"""
         logger.critical(f"🚨 ЭКСТРЕННОЕ ЗАКРЫТИЕ ВСЕХ ПОЗИЦИЙ: {reason}")
 
-        positions_to_close = list(self.portfolio.positions.values())
+        positions_to_close = tuple(self.portfolio.positions.values())
 
         if not positions_to_close:
             logger.info("✅ Нет открытых позиций для закрытия")
@@ -300,13 +441,10 @@ class PositionManager:
         }
 
         # Закрываем все позиции параллельно
-        close_tasks = []
-        for position in positions_to_close:
-            task = asyncio.create_task(self._emergency_close_single_position(position, reason))
-            close_tasks.append(task)
-
-        # Ждем завершения всех задач
-        close_results = await asyncio.gather(*close_tasks, return_exceptions=True)
+        close_results = await asyncio.gather(
+            *(self._emergency_close_single_position(position, reason) for position in positions_to_close),
+            return_exceptions=True
+        )
 
         # Анализируем результаты
         for i, result in enumerate(close_results):
@@ -343,36 +481,34 @@ class PositionManager:
     async def _emergency_close_single_position(self, position, reason: str):
         """Экстренное закрытие одной позиции"""
         position_id = position.id
+        now = datetime.utcnow()
 
         try:
-            logger.info(f"🔄 Экстренное закрытие позиции {position_id}")
+            logger.debug("🔄 Экстренное закрытие позиции {}", position_id)
 
             # Программное закрытие позиции (эмулируем текущую цену)
             # В реальной системе здесь должен быть вызов к exchange_manager
-            current_price = position.entry_price * Decimal("1.001")  # +0.1% для примера
+            current_price = position.entry_price * _EMERG_SLIPPAGE
 
             closed_position = await self.portfolio.close_position(position_id, current_price)
 
             if closed_position:
-                # Публикация события закрытия
-                await self.event_bus.publish(Event(
-                    type=EventType.POSITION_CLOSED,
-                    data={
-                        'position_id': position_id,
-                        'symbol': position.symbol,
-                        'pnl': float(closed_position.pnl),
-                        'pnl_percent': float(closed_position.pnl_percent),
-                        'reason': f"emergency_{reason}",
-                        'duration': str(datetime.utcnow() - position.opened_at),
-                        'entry_price': float(position.entry_price),
-                        'exit_price': float(current_price)
-                    },
-                    source="PositionManager"
-                ))
-
                 # Очистка метаданных
-                if position_id in self.position_trackers:
-                    del self.position_trackers[position_id]
+                strategy = self._untrack_position(position)
+
+                # Публикация события закрытия
+                self._dispatch_position_event(EventType.POSITION_CLOSED, {
+                    'position_id': position_id,
+                    'symbol': position.symbol,
+                    'pnl': float(closed_position.pnl),
+                    'pnl_percent': float(closed_position.pnl_percent),
+                    'reason': f"emergency_{reason}",
+                    'duration_ms': int((now - position.opened_at).total_seconds() * 1000),
+                    'strategy': strategy,
+                    'entry_price': position.entry_price_float,
+                    'exit_price': float(current_price),
+                    'quantity': position.quantity_float
+                })
 
                 return {
                     'success': True,
@@ -398,7 +534,7 @@ class PositionManager:
     async def force_close_position_by_symbol(self, symbol: str, reason: str = "Manual force close"):
         """Принудительное закрытие позиции по символу"""
         try:
-            position = await self._get_position_by_symbol(symbol)
+            position = self.portfolio.get_position_by_symbol(symbol)
 
             if not position:
                 logger.warning(f"⚠️ Позиция по символу {symbol} не найдена")
@@ -421,7 +557,7 @@ class PositionManager:
         """Получение статуса экстренных операций"""
         return {
             'open_positions_count': len(self.portfolio.positions),
-            'positions_by_symbol': {pos.symbol: pos.id for pos in self.portfolio.positions.values()},
+            'positions_by_symbol': dict(self.portfolio.position_ids_by_symbol),
             'emergency_available': True,
             'last_emergency_time': getattr(self, '_last_emergency_time', None),
             'timestamp': datetime.utcnow().isoformat()
@@ -458,8 +594,25 @@ class PositionManager:
         """Остановка менеджера позиций"""
         logger.info("📈 Остановка менеджера позиций")
 
+        # Останавливаем фоновую обработку маркером: собранный пакет дорабатывается
+        if self._fill_consumer_task:
+            await self._fill_queue.put(_FILL_STOP)
+            try:
+                await self._fill_consumer_task
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработки буфера исполненных ордеров: {e}")
+            self._fill_consumer_task = None
+
+        pending_fills = []
+        while not self._fill_queue.empty():
+            pending_fills.append(self._fill_queue.get_nowait())
+            self._fill_queue.task_done()
+        if pending_fills:
+            await self._process_fill_batch(pending_fills)
+
         # Экстренное закрытие всех позиций при остановке
         if self.portfolio.positions:
             await self.close_all_positions("engine_shutdown")
 
-        self.position_trackers.clear()
\ No newline at end of file
+        self.position_trackers.clear()
+        self._strategy_stats.clear()
\ No newline at end of file
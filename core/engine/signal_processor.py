@@ -2,33 +2,86 @@
 """
 Улучшенный процессор сигналов с валидацией данных
 """
-from typing import Dict, Optional
+from typing import Dict, Final, Optional
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime
 from decimal import Decimal
 from loguru import logger
+import asyncio
+import hashlib
 import json
+import time
 import pandas as pd
 
 from core.event_bus import EventBus, Event, EventType
 from risk.risk_manager import RiskManager
+from utils.sizing import kelly_weight
 from models.trading_signals import (
     AIAnalysisResult, TradingSignal, SignalType,
-    create_signal_from_analysis, validate_analysis_event_data
+    AnalysisEventData, create_signal_from_analysis, validate_analysis_event_data
 )
 
 
+# Пороги генерации сигнала
+_CONF_MIN: Final[float] = 0.6  # Минимальная уверенность
+_TECH_MIN: Final[float] = 0.3  # Минимальный скор технической валидации
+_MAX_RISK_SCORE: Final[float] = 0.8  # Максимальный риск-скор сигнала
+_HOLD: Final = SignalType.HOLD
+
+_Q8: Final = Decimal('1E-8')  # Точность размера позиции
+_MIN_SIZE: Final = Decimal('0.001')  # Минимальный размер позиции
+
+PORTFOLIO_STATS_TTL: Final[float] = 0.5  # секунды жизни кэша статистики портфеля
+VALIDATION_CACHE_SIZE: Final[int] = 128  # Последние провалидированные события анализа
+VALIDATION_WORKERS: Final[int] = 2  # Потоки для Pydantic валидации вне event loop
+
+
+@dataclass(slots=True, frozen=True)
+class SignalRecord:
+    """Запись истории сигналов"""
+    timestamp: datetime
+    signal: TradingSignal
+    processed: bool = True
+
+
 class SignalProcessor:
     """Процессор торговых сигналов - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
 
+    __slots__ = (
+        'event_bus', 'risk_manager', 'processed_signals', 'signal_history',
+        '_confidence_sum', '_symbol_counts', '_action_counts',
+        '_portfolio_cache', '_validation_cache', '_executor'
+    )
+
     def __init__(self, event_bus: EventBus, risk_manager: RiskManager):
         self.event_bus = event_bus
         self.risk_manager = risk_manager
         self.processed_signals = {}
-        self.signal_history = []
+        self.signal_history: deque[SignalRecord] = deque(maxlen=1000)
+
+        # Агрегаты по signal_history, обновляются при добавлении/вытеснении
+        self._confidence_sum = 0.0
+        self._symbol_counts: Counter = Counter()
+        self._action_counts: Counter = Counter({'BUY': 0, 'SELL': 0, 'HOLD': 0})
+
+        # Кэш статистики портфеля: (время monotonic, статистика)
+        self._portfolio_cache: Optional[tuple[float, Dict]] = None
+
+        # Кэш валидации: дайджест данных события -> провалидированная модель
+        self._validation_cache: OrderedDict[bytes, AnalysisEventData] = OrderedDict()
+
+        # Пул для валидации - event loop не блокируется на разборе данных.
+        # Создается при инициализации (или первой валидации), закрывается в stop()
+        self._executor: Optional[ThreadPoolExecutor] = None
 
     async def initialize(self):
         """Инициализация процессора"""
         logger.info("⚡ Инициализация процессора сигналов")
 
+        self._ensure_executor()
+
         # Подписка на события с улучшенной обработкой ошибок
         self.event_bus.subscribe(EventType.AI_ANALYSIS_COMPLETE, self._on_analysis_complete_safe)
 
@@ -48,15 +101,48 @@ class SignalProcessor:
                 logger.error(f"❌ Отсутствуют обязательные поля: {missing_fields}")
                 return
 
-            # Валидация через Pydantic модель
-            validated_data = validate_analysis_event_data(event.data)
+            # Валидация через Pydantic модель (повторы берутся из кэша)
+            validated_data = await self._validate_cached(event.data)
 
             # Обработка валидированных данных
             await self._process_validated_analysis(validated_data)
 
         except Exception as e:
             logger.error(f"❌ Ошибка обработки анализа: {e}")
-            logger.error(f"Event data: {json.dumps(event.data, default=str, indent=2)}")
+            logger.opt(lazy=True).debug(
+                "Event data: {}",
+                lambda: json.dumps(event.data, default=str, separators=(',', ':'))[:500]
+            )
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        """Пул потоков валидации (новый после stop())"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=VALIDATION_WORKERS, thread_name_prefix='sigproc')
+        return self._executor
+
+    async def _validate_cached(self, data: Dict) -> AnalysisEventData:
+        """Валидация данных анализа с запоминанием последних результатов
+
+        Повторно публикуемые одинаковые снимки анализа не проходят
+        Pydantic валидацию заново, новые валидируются в пуле потоков.
+        """
+        key = hashlib.blake2b(
+            json.dumps(data, sort_keys=True, default=str, separators=(',', ':')).encode(),
+            digest_size=8
+        ).digest()
+
+        validated = self._validation_cache.get(key)
+        if validated is not None:
+            self._validation_cache.move_to_end(key)
+            return validated
+
+        loop = asyncio.get_running_loop()
+        validated = await loop.run_in_executor(self._ensure_executor(), validate_analysis_event_data, data)
+        self._validation_cache[key] = validated
+        if len(self._validation_cache) > VALIDATION_CACHE_SIZE:
+            self._validation_cache.popitem(last=False)
+
+        return validated
 
     async def _process_validated_analysis(self, data):
         """Обработка валидированного анализа"""
@@ -66,41 +152,47 @@ class SignalProcessor:
         logger.info(f"📊 Обработка анализа для {symbol}: {analysis.action}")
 
         try:
-            # Проверка условий генерации сигнала
+            # Оценка сигнала вместе с размером позиции и проверкой риска
             signal = await self._evaluate_signal_safe(symbol, analysis)
 
             if signal:
-                # Проверка риска
-                if await self._validate_risk_safe(signal):
-                    # Генерация торгового сигнала
-                    await self._generate_trading_signal_safe(signal)
-                else:
-                    logger.info(f"⚠️ Сигнал {symbol} отклонен риск-менеджером")
-            else:
-                logger.debug(f"📊 {symbol}: Нет условий для генерации сигнала")
+                # Генерация торгового сигнала
+                await self._generate_trading_signal_safe(signal)
 
         except Exception as e:
             logger.error(f"❌ Ошибка процессинга анализа {symbol}: {e}")
 
     async def _evaluate_signal_safe(self, symbol: str, analysis: AIAnalysisResult) -> Optional[TradingSignal]:
-        """Безопасная оценка сигнала"""
+        """Оценка сигнала за один проход
+
+        Фильтры по анализу, размер позиции и проверка риска портфеля -
+        возвращает готовый к публикации сигнал или None.
+        """
         try:
-            # Проверка базовых условий
-            if analysis.action == SignalType.HOLD:
+            # Проверка базовых условий (от самых частых причин отказа)
+            if analysis.action is _HOLD:
+                logger.debug("📊 {}: Нет условий для генерации сигнала", symbol)
                 return None
 
             confidence = analysis.adjusted_confidence or analysis.confidence
-            if confidence < 0.6:
-                logger.debug(f"📊 {symbol}: Низкая уверенность {confidence:.2f}")
+            if confidence < _CONF_MIN:
+                logger.debug("📊 {}: Низкая уверенность {:.2f}", symbol, confidence)
                 return None
 
             # Проверка технической валидации
-            if analysis.technical_validation:
-                tech_score = analysis.technical_validation.score
-                if tech_score < 0.3:
-                    logger.debug(f"📊 {symbol}: Слабая техническая валидация {tech_score:.2f}")
+            technical_validation = analysis.technical_validation
+            if technical_validation:
+                tech_score = technical_validation.score
+                if tech_score < _TECH_MIN:
+                    logger.debug("📊 {}: Слабая техническая валидация {:.2f}", symbol, tech_score)
                     return None
 
+            # Проверка риск-скора - до расчета размера и проверок портфеля
+            risk_score = analysis.risk_score or 0.5
+            if risk_score > _MAX_RISK_SCORE:
+                logger.warning(f"⚠️ Высокий риск-скор для {symbol}: {risk_score}")
+                return None
+
             # Расчет размера позиции
             position_size = await self._calculate_position_size_safe(analysis, confidence)
 
@@ -115,6 +207,11 @@ class SignalProcessor:
                 strategy="ai_driven"
             )
 
+            # Проверка риска портфеля с итоговым размером
+            if not await self._validate_risk_safe(signal):
+                logger.info(f"⚠️ Сигнал {symbol} отклонен риск-менеджером")
+                return None
+
             return signal
 
         except Exception as e:
@@ -125,61 +222,78 @@ class SignalProcessor:
         """Безопасный расчет размера позиции"""
         try:
             # Получение статистики портфеля
-            portfolio_stats = await self.risk_manager.portfolio.get_portfolio_stats()
+            portfolio_stats = await self._get_portfolio_stats_cached()
             available_balance = float(portfolio_stats['available_balance'])
 
             if available_balance <= 0:
                 logger.warning("⚠️ Недостаточно средств для торговли")
                 return Decimal("0")
 
-            # Базовый процент от депозита
-            base_percent = 2.0  # 2% базовый размер
-
-            # Корректировка на уверенность
-            adjusted_percent = base_percent * confidence
-
-            # Корректировка на риск
-            risk_score = analysis.risk_score or 0.5
-            risk_multiplier = max(0.1, 1.0 - (risk_score * 0.5))  # Снижаем размер при высоком риске
-
-            final_percent = adjusted_percent * risk_multiplier
-
-            # Расчет размера в USD
-            position_value = available_balance * (final_percent / 100)
-
             # Примерная цена (должна приходить из анализа)
             estimated_price = float(analysis.entry_price or Decimal("45000"))  # Fallback
 
+            # Доля депозита по Келли в пределах лимита риск-менеджера
+            config = self.risk_manager.config
+            win, loss = self._payoff(analysis, estimated_price)
+            weight = kelly_weight(
+                float(confidence), win, loss, config.trading_cost_bps / 10000,
+                float(analysis.risk_score if analysis.risk_score is not None else 0.5),
+                config.sigma_forecast, config.sigma_target, config.max_vol_weight,
+                config.max_position_size_percent / 100
+            )
+
+            if weight <= 0:
+                logger.debug("📊 {}: Нет преимущества после издержек", analysis.symbol)
+                return Decimal("0")
+
             # Размер в базовой валюте
-            position_size = position_value / estimated_price
+            position_size = available_balance * weight / estimated_price
 
-            return Decimal(str(max(0.001, position_size)))  # Минимальный размер
+            return max(_MIN_SIZE, Decimal(position_size).quantize(_Q8))  # Минимальный размер
 
         except Exception as e:
             logger.error(f"❌ Ошибка расчета размера позиции: {e}")
             return Decimal("0")
 
+    def _payoff(self, analysis: AIAnalysisResult, price: float) -> tuple[float, float]:
+        """Доходность при тейк-профите и убыток при стоп-лоссе (доли от цены)
+
+        Берутся из уровней анализа, иначе - из процентов RiskConfig.
+        """
+        config = self.risk_manager.config
+        win = config.take_profit_percent / 100
+        loss = config.stop_loss_percent / 100
+
+        if analysis.entry_price:
+            if analysis.take_profit:
+                win = abs(float(analysis.take_profit) - price) / price
+            if analysis.stop_loss:
+                loss = abs(price - float(analysis.stop_loss)) / price
+
+        return win, loss
+
+    async def _get_portfolio_stats_cached(self) -> Dict:
+        """Статистика портфеля с коротким TTL - пачка сигналов делит один снимок"""
+        now = time.monotonic()
+
+        if self._portfolio_cache and now - self._portfolio_cache[0] < PORTFOLIO_STATS_TTL:
+            return self._portfolio_cache[1]
+
+        stats = await self.risk_manager.portfolio.get_portfolio_stats()
+        self._portfolio_cache = (now, stats)
+        return stats
+
     async def _validate_risk_safe(self, signal: TradingSignal) -> bool:
-        """Безопасная валидация риска"""
+        """Безопасная валидация риска портфеля"""
         try:
             # Проверка через риск-менеджер
-            risk_ok = await self.risk_manager.check_position_risk(
+            return await self.risk_manager.check_position_risk(
                 symbol=signal.symbol,
                 side=signal.action.value.lower(),
                 entry_price=signal.position_size_usd / signal.quantity,  # Примерная цена
                 quantity=signal.quantity
             )
 
-            if not risk_ok:
-                return False
-
-            # Проверка риск-скора
-            if signal.risk_score > 0.8:
-                logger.warning(f"⚠️ Высокий риск-скор для {signal.symbol}: {signal.risk_score}")
-                return False
-
-            return True
-
         except Exception as e:
             logger.error(f"❌ Ошибка валидации риска: {e}")
             return False
@@ -188,18 +302,11 @@ class SignalProcessor:
         """Безопасная генерация торгового сигнала"""
         try:
             # Добавление в историю
-            self.signal_history.append({
-                'timestamp': signal.generated_at,
-                'signal': signal,
-                'processed': True
-            })
-
-            # Ограничение размера истории
-            if len(self.signal_history) > 1000:
-                self.signal_history = self.signal_history[-500:]
-
-            # Публикация события
-            await self.event_bus.publish(Event(
+            self._record_signal(signal)
+
+            # Публикация без ожидания: очередь шины неограниченная,
+            # генерация сигнала не прерывается на каждом событии
+            self.event_bus.publish_nowait(Event(
                 type=EventType.SIGNAL_GENERATED,
                 data={
                     'symbol': signal.symbol,
@@ -222,6 +329,27 @@ class SignalProcessor:
         except Exception as e:
             logger.error(f"❌ Ошибка генерации сигнала: {e}")
 
+    def _record_signal(self, signal: TradingSignal):
+        """Добавление сигнала в историю с обновлением агрегатов"""
+        # deque вытеснит самую старую запись - вычитаем ее из агрегатов
+        if len(self.signal_history) == self.signal_history.maxlen:
+            self._forget_signal(self.signal_history[0].signal)
+
+        self.signal_history.append(SignalRecord(signal.generated_at, signal))
+
+        self._confidence_sum += signal.confidence
+        self._symbol_counts[signal.symbol] += 1
+        self._action_counts[signal.action.value] += 1
+
+    def _forget_signal(self, signal: TradingSignal):
+        """Вычитание вытесненного сигнала из агрегатов"""
+        self._confidence_sum -= signal.confidence
+        self._action_counts[signal.action.value] -= 1
+
+        self._symbol_counts[signal.symbol] -= 1
+        if self._symbol_counts[signal.symbol] <= 0:
+            del self._symbol_counts[signal.symbol]
+
     async def get_signal_statistics(self) -> Dict:
         """Получение статистики сигналов"""
         try:
@@ -235,29 +363,16 @@ class SignalProcessor:
                     'signal_distribution': {}
                 }
 
-            # Расчет средней уверенности
-            avg_confidence = sum(s['signal'].confidence for s in self.signal_history) / total_signals
-
             # Самый активный символ
-            symbol_counts = {}
-            action_counts = {'BUY': 0, 'SELL': 0, 'HOLD': 0}
-
-            for record in self.signal_history:
-                symbol = record['signal'].symbol
-                action = record['signal'].action.value
-
-                symbol_counts[symbol] = symbol_counts.get(symbol, 0) + 1
-                action_counts[action] = action_counts.get(action, 0) + 1
-
-            most_active_symbol = max(symbol_counts.items(), key=lambda x: x[1])[0] if symbol_counts else None
+            most_active = self._symbol_counts.most_common(1)
 
             return {
                 'total_signals': total_signals,
-                'avg_confidence': avg_confidence,
-                'most_active_symbol': most_active_symbol,
-                'signal_distribution': action_counts,
-                'symbols_traded': list(symbol_counts.keys()),
-                'recent_signals': len([s for s in self.signal_history[-20:]]),  # Последние 20
+                'avg_confidence': self._confidence_sum / total_signals,
+                'most_active_symbol': most_active[0][0] if most_active else None,
+                'signal_distribution': dict(self._action_counts),
+                'symbols_traded': list(self._symbol_counts),
+                'recent_signals': min(total_signals, 20),  # Последние 20
             }
 
         except Exception as e:
@@ -274,12 +389,20 @@ class SignalProcessor:
 
         self.processed_signals.clear()
         self.signal_history.clear()
+        self._portfolio_cache = None
+        self._validation_cache.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._confidence_sum = 0.0
+        self._symbol_counts.clear()
+        self._action_counts = Counter({'BUY': 0, 'SELL': 0, 'HOLD': 0})
 
 
 # Класс для совместимости с импортами
 class EnhancedSignalProcessor(SignalProcessor):
     """Алиас для совместимости"""
-    pass
+    __slots__ = ()
 
 
 # Исправления для использования в TradingEngine
@@ -288,27 +411,20 @@ class EventDataFixer:
 
     @staticmethod
     def fix_analysis_data(data: Dict) -> Dict:
-        """Исправление данных анализа для Event Bus"""
-        fixed_data = data.copy()
-
-        # Убеждаемся что analysis содержит обязательные поля
-        if 'analysis' in fixed_data:
-            analysis = fixed_data['analysis']
+        """Исправление данных анализа для Event Bus
 
-            # Добавляем отсутствующие поля
-            if 'action' not in analysis:
-                analysis['action'] = 'HOLD'
+        Отсутствующие поля analysis дописываются на месте - без копирования.
+        """
+        analysis = data.get('analysis')
 
-            if 'confidence' not in analysis:
-                analysis['confidence'] = 0.0
-
-            if 'reasoning' not in analysis:
-                analysis['reasoning'] = 'Недостаточно данных'
-
-            if 'symbol' not in analysis:
-                analysis['symbol'] = fixed_data.get('symbol', 'UNKNOWN')
+        # Убеждаемся что analysis содержит обязательные поля
+        if isinstance(analysis, dict):
+            analysis.setdefault('action', 'HOLD')
+            analysis.setdefault('confidence', 0.0)
+            analysis.setdefault('reasoning', 'Недостаточно данных')
+            analysis.setdefault('symbol', data.get('symbol', 'UNKNOWN'))
 
-        return fixed_data
+        return data
 
     def _determine_trend(self, data: pd.DataFrame) -> str:
         """Определение тренда (копия из market_analyzer)"""
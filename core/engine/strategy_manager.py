@@ -4,6 +4,7 @@
 """
 from typing import List, Dict
 from loguru import logger
+import asyncio
 
 from config.trading_config import TradingConfig
 from core.event_bus import EventBus, Event, EventType
@@ -18,6 +19,7 @@ class StrategyManager:
         self.trading_config = trading_config
         self.event_bus = event_bus
         self.strategies = []
+        self._active_strategies: List = []  # Пересобирается при изменении .active
 
     async def initialize(self):
         """Инициализация стратегий"""
@@ -25,6 +27,7 @@ class StrategyManager:
 
         await self._initialize_momentum_strategy()
         await self._initialize_ai_strategy()
+        self._rebuild_active()
 
         logger.info(f"✅ Инициализировано стратегий: {len(self.strategies)}")
 
@@ -75,29 +78,28 @@ class StrategyManager:
         analysis = data['analysis']
         technical_data = data.get('technical_data', {})
 
-        # Запуск всех активных стратегий
-        for strategy in self.strategies:
-            if not strategy.active:
-                continue
+        # Запуск всех активных стратегий параллельно
+        strategies = self._active_strategies
+        results = await asyncio.gather(
+            *(self._run_strategy(strategy, symbol, analysis, technical_data) for strategy in strategies),
+            return_exceptions=True
+        )
+
+        for strategy, result in zip(strategies, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Ошибка в стратегии {strategy.name} для {symbol}: {result}")
 
-            try:
-                await self._run_strategy(strategy, symbol, analysis, technical_data)
-            except Exception as e:
-                logger.error(f"❌ Ошибка в стратегии {strategy.name} для {symbol}: {e}")
+    def _rebuild_active(self):
+        """Пересборка списка активных стратегий"""
+        self._active_strategies = [strategy for strategy in self.strategies if strategy.active]
 
     async def _run_strategy(self, strategy, symbol: str, analysis: Dict, technical_data: Dict):
         """Запуск отдельной стратегии"""
 
         try:
-            # Создаем DataFrame из технических данных для стратегии
-            import pandas as pd
-
-            # В реальности здесь должны быть полные данные, а не одна строка
-            # Это упрощенная версия
-            mock_data = pd.DataFrame([technical_data])
-
-            # Анализ стратегии
-            strategy_analysis = await strategy.analyze(mock_data, symbol)
+            # Анализ стратегии по срезу технических данных (индикаторы
+            # уже рассчитаны MarketAnalyzer по полной истории)
+            strategy_analysis = await strategy.analyze_row(technical_data, symbol)
 
             # Проверка условий входа
             if await strategy.should_enter(strategy_analysis):
@@ -140,13 +142,14 @@ class StrategyManager:
 
     async def get_active_strategies(self) -> List[str]:
         """Получение списка активных стратегий"""
-        return [strategy.name for strategy in self.strategies if strategy.active]
+        return [strategy.name for strategy in self._active_strategies]
 
     async def toggle_strategy(self, strategy_name: str, active: bool) -> bool:
         """Включение/выключение стратегии"""
         for strategy in self.strategies:
             if strategy.name == strategy_name:
                 strategy.active = active
+                self._rebuild_active()
                 logger.info(f"🎯 Стратегия {strategy_name}: {'включена' if active else 'выключена'}")
                 return True
 
@@ -176,4 +179,5 @@ class StrategyManager:
         for strategy in self.strategies:
             strategy.active = False
 
-        self.strategies.clear()
\ No newline at end of file
+        self.strategies.clear()
+        self._active_strategies = []
\ No newline at end of file
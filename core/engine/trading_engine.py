@@ -3,7 +3,7 @@
 Основной торговый движок - обновлен для подключения компонентов
 """
 import asyncio
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 from datetime import datetime
 
@@ -21,6 +21,10 @@ from .strategy_manager import StrategyManager
 from .notification_manager import NotificationManager
 
 
+MAX_CONCURRENT_ANALYSES = 3  # Одновременных анализов пар (ограничение запросов к бирже/AI)
+TRADING_CYCLE_INTERVAL = 30  # секунд между торговыми циклами без внешних триггеров
+
+
 class TradingEngine:
     """Главный оркестратор торговой системы - обновленная версия"""
 
@@ -42,10 +46,22 @@ class TradingEngine:
         self.strategy_manager = StrategyManager(trading_config, self.event_bus)
         self.notification_manager = NotificationManager(settings, self.event_bus)
 
+        self._analysis_semaphore = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+
+        # Включенные торговые пары - конфигурация не меняется во время работы
+        self._enabled_symbols: Tuple[str, ...] = ()
+
+        # Пробуждение основного цикла: внеочередной цикл или остановка
+        self._wake = asyncio.Event()
+
     async def initialize(self):
         """Инициализация всех компонентов"""
         logger.info("🚀 Инициализация торгового движка")
 
+        self._enabled_symbols = tuple(
+            pair.symbol for pair in self.trading_config.trading_pairs if pair.enabled
+        )
+
         # Порядок инициализации важен!
         await self.event_bus.start()
         await self.exchange_manager.initialize()
@@ -76,30 +92,54 @@ class TradingEngine:
 
         await self.initialize()
         self.is_running = True
+        self._wake.clear()  # Сброс пробуждения, оставленного предыдущим stop()
 
         logger.info("🎯 Запуск торгового цикла")
 
         try:
             while self.is_running:
                 await self._trading_cycle()
-                await asyncio.sleep(30)  # Основной цикл каждые 30 секунд
+                await self._wait_next_cycle()
 
         except KeyboardInterrupt:
             logger.info("⏹️ Получен сигнал остановки")
         finally:
             await self.stop()
 
+    async def _wait_next_cycle(self):
+        """Ожидание следующего цикла: по интервалу, запросу или остановке"""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=TRADING_CYCLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    def request_cycle(self):
+        """Запуск внеочередного торгового цикла (например, по рыночному событию)"""
+        self._wake.set()
+
     async def _trading_cycle(self):
         """Основной торговый цикл"""
         try:
-            # Получение данных и анализ
-            for trading_pair in self.trading_config.trading_pairs:
-                if trading_pair.enabled:
-                    await self.market_analyzer.analyze_symbol(trading_pair.symbol)
+            # Получение данных и анализ - пары анализируются параллельно
+            symbols = self._enabled_symbols
+            results = await asyncio.gather(
+                *(self._analyze_symbol_limited(symbol) for symbol in symbols),
+                return_exceptions=True
+            )
+
+            for symbol, result in zip(symbols, results):
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Ошибка анализа {symbol} в торговом цикле: {result}")
 
         except Exception as e:
             logger.error(f"❌ Ошибка в торговом цикле: {e}")
 
+    async def _analyze_symbol_limited(self, symbol: str):
+        """Анализ символа с ограничением числа одновременных анализов"""
+        async with self._analysis_semaphore:
+            await self.market_analyzer.analyze_symbol(symbol)
+
     async def test_real_analysis(self, symbol: str):
         """Тестирование реального анализа с отчетом"""
         logger.info(f"🧪 Тестирование реального анализа для {symbol}")
@@ -137,6 +177,7 @@ class TradingEngine:
         """Остановка всех компонентов"""
         logger.info("🛑 Остановка торгового движка")
         self.is_running = False
+        self._wake.set()  # Основной цикл выходит без ожидания интервала
 
         # Остановка в обратном порядке
         await self.notification_manager.stop()
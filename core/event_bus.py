@@ -3,8 +3,9 @@
 Асинхронная шина событий для связи компонентов
 """
 import asyncio
-from typing import Dict, List, Callable, Any
-from dataclasses import dataclass
+import time
+from typing import Dict, List, Tuple, Callable, Any
+from dataclasses import dataclass, field
 from datetime import datetime
 from loguru import logger
 from enum import Enum
@@ -34,46 +35,83 @@ class EventType(Enum):
     RISK_ALERT = "risk_alert"
     SYSTEM_ERROR = "system_error"
     PERFORMANCE_UPDATE = "performance_update"
+    EMERGENCY_STOP = "emergency_stop"
 
 
-@dataclass
+_STOP = object()  # Маркер остановки воркера в очереди событий
+EVENT_BATCH_SIZE = 256  # Максимум событий, забираемых из очереди за один проход
+
+
+def _handler_name(handler: Callable) -> str:
+    """Имя обработчика для логов (partial и callable-объекты без __qualname__)"""
+    return getattr(handler, '__qualname__', None) or repr(handler)
+
+
+def _handler_key(handler: Callable) -> Tuple[int, int]:
+    """Ключ обработчика без хеширования самого обработчика
+
+    Bound method при каждом обращении - новый объект, поэтому для него ключ -
+    пара (объект, функция): self._on_x, подписанный на несколько типов событий,
+    остается одним обработчиком.
+    """
+    return id(getattr(handler, '__self__', None)), id(getattr(handler, '__func__', handler))
+
+
+@dataclass(slots=True)
 class Event:
     """Базовый класс события"""
     type: EventType
     data: Dict[str, Any]
-    timestamp: datetime = None
+    timestamp: float = field(default_factory=time.time)  # Unix время, секунды
     source: str = None
 
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.utcnow()
+    @property
+    def created_at(self) -> datetime:
+        """Время создания события как datetime (UTC) - для логов и отчетов"""
+        return datetime.utcfromtimestamp(self.timestamp)
 
 
 class EventBus:
     """Асинхронная шина событий"""
 
     def __init__(self):
-        self._subscribers: Dict[EventType, List[Callable]] = {}
+        # Неизменяемые кортежи (обработчик, корутина ли) - пересобираются при подписке
+        self._subscribers: Dict[EventType, Tuple[Tuple[Callable, bool], ...]] = {}
         self._event_queue: asyncio.Queue = asyncio.Queue()
         self._running = False
         self._worker_task = None
 
     def subscribe(self, event_type: EventType, handler: Callable):
         """Подписка на событие"""
-        if event_type not in self._subscribers:
-            self._subscribers[event_type] = []
-        self._subscribers[event_type].append(handler)
-        logger.debug(f"Подписка на {event_type.value}: {handler.__name__}")
+        entry = (handler, asyncio.iscoroutinefunction(handler))
+        self._subscribers[event_type] = self._subscribers.get(event_type, ()) + (entry,)
+        logger.debug("Подписка на {.value}: {}", event_type, _handler_name(handler))
 
     def unsubscribe(self, event_type: EventType, handler: Callable):
         """Отписка от события"""
-        if event_type in self._subscribers:
-            self._subscribers[event_type].remove(handler)
+        handlers = self._subscribers.get(event_type, ())
+        for i, (registered, _) in enumerate(handlers):
+            if registered == handler:
+                self._subscribers[event_type] = handlers[:i] + handlers[i + 1:]
+                break
+
+    def has_subscribers(self, event_type: EventType) -> bool:
+        """Есть ли подписчики на событие"""
+        return bool(self._subscribers.get(event_type))
 
     async def publish(self, event: Event):
         """Публикация события"""
+        if event.type not in self._subscribers or not self._subscribers[event.type]:
+            return  # Никто не подписан - событие не ставится в очередь
         await self._event_queue.put(event)
-        logger.debug(f"Событие опубликовано: {event.type.value}")
+        logger.debug("Событие опубликовано: {.value}", event.type)
+
+    def publish_nowait(self, event: Event):
+        """Публикация события без ожидания (очередь неограниченная)"""
+        if event.type not in self._subscribers or not self._subscribers[event.type]:
+            return  # Никто не подписан - событие не ставится в очередь
+        self._event_queue.put_nowait(event)
+        logger.debug("Событие опубликовано: {.value}", event.type)
 
     async def start(self):
         """Запуск обработки событий"""
@@ -85,43 +123,80 @@ class EventBus:
         """Остановка обработки событий"""
         self._running = False
         if self._worker_task:
+            # Воркер обработает уже опубликованные события и завершится на маркере
+            await self._event_queue.put(_STOP)
             await self._worker_task
+            self._worker_task = None
         logger.info("EventBus остановлен")
 
     async def _process_events(self):
         """Обработка очереди событий"""
-        while self._running:
+        stopping = False
+
+        while not stopping:
             try:
-                # Ждем событие с таймаутом
-                event = await asyncio.wait_for(
-                    self._event_queue.get(),
-                    timeout=1.0
-                )
-
-                # Вызываем все подписанные обработчики
-                if event.type in self._subscribers:
-                    handlers = self._subscribers[event.type]
-
-                    # Запускаем обработчики параллельно
-                    tasks = [
-                        asyncio.create_task(self._call_handler(handler, event))
-                        for handler in handlers
-                    ]
-
-                    # Ждем завершения всех обработчиков
-                    await asyncio.gather(*tasks, return_exceptions=True)
-
-            except asyncio.TimeoutError:
-                continue
+                # Ждем событие без периодических пробуждений
+                event = await self._event_queue.get()
+                if event is _STOP:
+                    break
+
+                # Забираем все уже накопившиеся события одной пачкой
+                batch = [event]
+                while len(batch) < EVENT_BATCH_SIZE:
+                    try:
+                        event = self._event_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if event is _STOP:
+                        stopping = True
+                        break
+                    batch.append(event)
+
+                await self._dispatch_batch(batch)
+
             except Exception as e:
                 logger.error(f"Ошибка обработки события: {e}")
 
-    async def _call_handler(self, handler: Callable, event: Event):
+    async def _dispatch_batch(self, batch: List[Event]):
+        """Доставка пачки событий
+
+        Каждый обработчик получает свои события последовательно в порядке
+        публикации, разные обработчики работают параллельно.
+        """
+        # Группировка по ключу обработчика: сами обработчики могут быть нехешируемыми
+        deliveries: Dict[Tuple[int, int], Tuple[Callable, bool, List[Event]]] = {}
+        for event in batch:
+            for handler, is_coro in self._subscribers.get(event.type, ()):
+                key = _handler_key(handler)
+                delivery = deliveries.get(key)
+                if delivery is None:
+                    delivery = deliveries[key] = (handler, is_coro, [])
+                delivery[2].append(event)
+
+        if not deliveries:
+            return
+
+        if len(deliveries) == 1:
+            # Единственный обработчик - без gather
+            _, (handler, is_coro, events) = deliveries.popitem()
+            await self._deliver(handler, is_coro, events)
+        else:
+            await asyncio.gather(*(
+                self._deliver(handler, is_coro, events)
+                for handler, is_coro, events in deliveries.values()
+            ), return_exceptions=True)
+
+    async def _deliver(self, handler: Callable, is_coro: bool, events: List[Event]):
+        """Последовательная доставка событий одному обработчику"""
+        for event in events:
+            await self._call_handler(handler, is_coro, event)
+
+    async def _call_handler(self, handler: Callable, is_coro: bool, event: Event):
         """Безопасный вызов обработчика"""
         try:
-            if asyncio.iscoroutinefunction(handler):
+            if is_coro:
                 await handler(event)
             else:
                 handler(event)
         except Exception as e:
-            logger.error(f"Ошибка в обработчике {handler.__name__}: {e}")
\ No newline at end of file
+            logger.error(f"Ошибка в обработчике {_handler_name(handler)}: {e}")
\ No newline at end of file
@@ -2,12 +2,13 @@
 """
 Управление жизненным циклом ордеров
 """
-from typing import Dict, List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 from decimal import Decimal
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 import asyncio
+import heapq
 from loguru import logger
 from core.event_bus import EventBus, Event, EventType
 from exchange.base_exchange import BaseExchange, Order
@@ -24,6 +25,15 @@ class OrderStatus(Enum):
     EXPIRED = "expired"
 
 
+# Финальные статусы (включая написание ccxt); любой другой статус, в том числе
+# неизвестный, оставляет ордер в active_orders
+_FINAL_STATUSES = frozenset({'filled', 'closed', 'cancelled', 'canceled', 'rejected', 'expired'})
+_FILLED_STATUSES = frozenset({'filled', 'closed'})
+
+BRACKET_WAIT_TIMEOUT = 300  # секунд ожидания исполнения перед созданием SL/TP
+ORDER_POLL_INTERVAL = 1.0  # секунд между REST опросами статусов (если биржа не пушит)
+
+
 @dataclass
 class ManagedOrder:
     """Управляемый ордер с дополнительной логикой"""
@@ -38,41 +48,64 @@ class ManagedOrder:
     max_retries: int = 3
     metadata: Dict = field(default_factory=dict)
 
+    # Устанавливается при переходе в финальный статус (исполнен/отменен/отклонен)
+    _settled: asyncio.Event = field(default_factory=asyncio.Event, init=False, repr=False, compare=False)
+
     @property
     def is_active(self) -> bool:
-        return self.order.status in ['pending', 'placed', 'partially_filled']
+        return self.order.status not in _FINAL_STATUSES
 
 
 class OrderManager:
     """Менеджер управления ордерами"""
 
-    def __init__(self, exchange: BaseExchange, event_bus: EventBus):
+    def __init__(self, exchange: BaseExchange, event_bus: EventBus,
+                 poll_interval: Optional[float] = ORDER_POLL_INTERVAL):
         self.exchange = exchange
         self.event_bus = event_bus
         self.orders: Dict[str, ManagedOrder] = {}
         self.active_orders: Dict[str, ManagedOrder] = {}
-        self._monitor_task = None
+
+        # Обновления статусов (push с биржи или REST опрос) и куча истечений
+        self.poll_interval = poll_interval
+        self._updates: asyncio.Queue = asyncio.Queue()
+        self._expiry_heap: List[tuple[datetime, str]] = []
+        self._expiry_changed = asyncio.Event()
+
+        self._tasks: List[asyncio.Task] = []
         self._running = False
 
     async def start(self):
         """Запуск мониторинга ордеров"""
         self._running = True
-        self._monitor_task = asyncio.create_task(self._monitor_orders())
+        self._tasks = [
+            asyncio.create_task(self._consume_updates()),
+            asyncio.create_task(self._expiry_ticker())
+        ]
+        if self.poll_interval:
+            self._tasks.append(asyncio.create_task(self._poll_orders()))
         logger.info("OrderManager запущен")
 
     async def stop(self):
         """Остановка мониторинга"""
         self._running = False
-        if self._monitor_task:
-            await self._monitor_task
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
         logger.info("OrderManager остановлен")
 
+    def on_order_update(self, order: Order):
+        """Прием обновления ордера (callback для websocket или REST опроса)"""
+        self._updates.put_nowait(order)
+
     async def place_order(self, symbol: str, side: str, order_type: str,
                           quantity: Decimal, price: Optional[Decimal] = None,
                           strategy: str = "manual",
                           stop_loss: Optional[Decimal] = None,
                           take_profit: Optional[Decimal] = None,
-                          expire_minutes: Optional[int] = None) -> ManagedOrder:
+                          expire_minutes: Optional[int] = None,
+                          metadata: Optional[Dict] = None) -> ManagedOrder:
         """Размещение управляемого ордера"""
 
         try:
@@ -91,12 +124,15 @@ class OrderManager:
                 strategy=strategy,
                 stop_loss=stop_loss,
                 take_profit=take_profit,
-                expire_time=expire_time
+                expire_time=expire_time,
+                metadata=metadata or {}
             )
 
             # Сохранение ордера
             self.orders[order.id] = managed_order
             self.active_orders[order.id] = managed_order
+            if expire_time:
+                self._schedule_expiry(managed_order)
 
             # Публикация события
             await self.event_bus.publish(Event(
@@ -138,6 +174,7 @@ class OrderManager:
             if success:
                 managed_order.order.status = 'cancelled'
                 del self.active_orders[order_id]
+                managed_order._settled.set()
 
                 # Публикация события
                 await self.event_bus.publish(Event(
@@ -161,13 +198,17 @@ class OrderManager:
     async def update_order(self, order_id: str,
                            new_price: Optional[Decimal] = None,
                            new_quantity: Optional[Decimal] = None) -> bool:
-        """Обновление ордера (отмена и пересоздание)"""
+        """Обновление ордера (изменение на бирже, иначе отмена и пересоздание)"""
 
         if order_id not in self.active_orders:
             return False
 
         managed_order = self.active_orders[order_id]
 
+        # Быстрый путь: биржа меняет ордер на месте, SL/TP ожидание сохраняется
+        if await self._amend_order(managed_order, new_price, new_quantity):
+            return True
+
         try:
             # Отмена старого ордера
             await self.cancel_order(order_id)
@@ -193,50 +234,166 @@ class OrderManager:
             logger.error(f"Ошибка обновления ордера {order_id}: {e}")
             return False
 
-    async def _monitor_orders(self):
-        """Мониторинг активных ордеров"""
+    async def _amend_order(self, managed_order: ManagedOrder,
+                           new_price: Optional[Decimal],
+                           new_quantity: Optional[Decimal]) -> bool:
+        """Изменение ордера через API биржи, если оно поддерживается"""
+
+        amend = getattr(self.exchange, 'amend_order', None)
+        if amend is None:
+            return False
+
+        old_id = managed_order.order.id
+
+        try:
+            amended = await amend(
+                managed_order.order,
+                new_price or managed_order.order.price,
+                new_quantity or managed_order.order.quantity
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось изменить ордер {old_id}, пересоздаем: {e}")
+            return False
+
+        if amended is None:
+            return False
+
+        managed_order.order = amended
+
+        # Некоторые биржи выдают измененному ордеру новый id
+        if amended.id != old_id:
+            self.orders[amended.id] = self.orders.pop(old_id)
+            self.active_orders[amended.id] = self.active_orders.pop(old_id)
+            if managed_order.expire_time:
+                self._schedule_expiry(managed_order)
+
+        logger.info(f"Ордер {amended.id} изменен: {amended.quantity} @ {amended.price}")
+        return True
+
+    async def _consume_updates(self):
+        """Применение обновлений ордеров из очереди"""
 
         while self._running:
+            updated_order = await self._updates.get()
+
             try:
-                # Копия списка для безопасной итерации
-                active_orders = list(self.active_orders.values())
+                managed_order = self.active_orders.get(updated_order.id)
+                if managed_order is None:
+                    continue
 
-                for managed_order in active_orders:
-                    # Проверка статуса на бирже
-                    updated_order = await self.exchange.get_order(
-                        managed_order.order.id,
-                        managed_order.order.symbol
-                    )
-
-                    if updated_order:
-                        # Обновление локального статуса
-                        old_status = managed_order.order.status
-                        managed_order.order = updated_order
-
-                        # Обработка изменения статуса
-                        if old_status != updated_order.status:
-                            await self._handle_status_change(managed_order, old_status)
-
-                    # Проверка истечения времени
-                    if managed_order.expire_time and datetime.utcnow() > managed_order.expire_time:
-                        await self._handle_order_expiration(managed_order)
+                # Обновление локального статуса
+                old_status = managed_order.order.status
+                managed_order.order = updated_order
+
+                # Обработка изменения статуса
+                if old_status != updated_order.status:
+                    await self._handle_status_change(managed_order, old_status)
+
+            except Exception as e:
+                logger.error(f"Ошибка обработки обновления ордера {updated_order.id}: {e}")
+
+    async def _poll_orders(self):
+        """REST опрос активных ордеров - для бирж без push обновлений"""
+
+        while self._running:
+            try:
+                active_orders = tuple(self.active_orders.values())
+
+                if active_orders:
+                    for updated_order in await self._fetch_order_updates(active_orders):
+                        self.on_order_update(updated_order)
 
                 # Пауза между проверками
-                await asyncio.sleep(1)
+                await asyncio.sleep(self.poll_interval)
 
             except Exception as e:
                 logger.error(f"Ошибка мониторинга ордеров: {e}")
                 await asyncio.sleep(5)
 
+    async def _fetch_order_updates(self, active_orders: Tuple[ManagedOrder, ...]) -> List[Order]:
+        """Статусы активных ордеров: один запрос открытых ордеров на символ
+
+        Ордера, пропавшие из списка открытых (исполнены или отменены), и весь
+        список при ошибке пакетного запроса запрашиваются по одному.
+        """
+        missing = active_orders
+        updates = []
+
+        if hasattr(self.exchange, 'get_open_orders'):
+            try:
+                symbols = list({managed_order.order.symbol for managed_order in active_orders})
+                open_orders = {order.id: order for order in await self.exchange.get_open_orders(symbols)}
+
+                missing = []
+                for managed_order in active_orders:
+                    updated_order = open_orders.get(managed_order.order.id)
+                    if updated_order is None:
+                        missing.append(managed_order)
+                    else:
+                        updates.append(updated_order)
+
+            except Exception as e:
+                logger.warning(f"Пакетный запрос ордеров не удался, опрос по одному: {e}")
+
+        if missing:
+            # Запросы статусов выполняются параллельно
+            results = await asyncio.gather(*(
+                self.exchange.get_order(managed_order.order.id, managed_order.order.symbol)
+                for managed_order in missing
+            ), return_exceptions=True)
+            updates.extend(order for order in results if isinstance(order, Order))
+
+        return updates
+
+    def _schedule_expiry(self, managed_order: ManagedOrder):
+        """Добавление ордера в кучу истечений"""
+        heapq.heappush(self._expiry_heap, (managed_order.expire_time, managed_order.order.id))
+
+        # Новый ближайший срок - будим таймер
+        if self._expiry_heap[0][1] == managed_order.order.id:
+            self._expiry_changed.set()
+
+    async def _expiry_ticker(self):
+        """Отмена ордеров по истечении времени - спим до ближайшего срока"""
+
+        while self._running:
+            try:
+                now = datetime.utcnow()
+
+                while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                    _, order_id = heapq.heappop(self._expiry_heap)
+
+                    # Уже исполненные/отмененные ордера просто снимаются с кучи
+                    managed_order = self.active_orders.get(order_id)
+                    if managed_order:
+                        await self._handle_order_expiration(managed_order)
+
+                timeout = (self._expiry_heap[0][0] - now).total_seconds() if self._expiry_heap else None
+
+                self._expiry_changed.clear()
+                try:
+                    await asyncio.wait_for(self._expiry_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            except Exception as e:
+                logger.error(f"Ошибка обработки истечения ордеров: {e}")
+                await asyncio.sleep(5)
+
     async def _handle_status_change(self, managed_order: ManagedOrder, old_status: str):
         """Обработка изменения статуса ордера"""
 
         new_status = managed_order.order.status
 
-        if new_status == 'filled':
-            # Ордер полностью исполнен
-            del self.active_orders[managed_order.order.id]
+        if new_status not in _FINAL_STATUSES:
+            return
+
+        # Ордер завершен: снимаем с активных и будим ожидающих (bracket ордера)
+        self.active_orders.pop(managed_order.order.id, None)
+        managed_order._settled.set()
 
+        if new_status in _FILLED_STATUSES:
+            # Ордер полностью исполнен
             await self.event_bus.publish(Event(
                 type=EventType.ORDER_FILLED,
                 data={
@@ -252,15 +409,8 @@ class OrderManager:
 
             logger.info(f"Ордер {managed_order.order.id} исполнен")
 
-        elif new_status == 'cancelled':
-            # Ордер отменен
-            del self.active_orders[managed_order.order.id]
-
         elif new_status == 'rejected':
-            # Ордер отклонен
-            del self.active_orders[managed_order.order.id]
-
-            # Попытка повторного размещения
+            # Ордер отклонен - попытка повторного размещения
             if managed_order.retry_count < managed_order.max_retries:
                 await self._retry_order(managed_order)
 
@@ -305,41 +455,41 @@ class OrderManager:
     async def _wait_and_create_brackets(self, managed_order: ManagedOrder):
         """Ожидание исполнения и создание bracket ордеров"""
 
-        # Ждем исполнения основного ордера
-        max_wait = 300  # 5 минут
-        waited = 0
-
-        while waited < max_wait and managed_order.order.id in self.active_orders:
-            await asyncio.sleep(1)
-            waited += 1
-
-            if managed_order.order.status == 'filled':
-                # Создаем стоп-лосс
-                if managed_order.stop_loss:
-                    sl_side = 'sell' if managed_order.order.side == 'buy' else 'buy'
-                    sl_order = await self.place_order(
-                        symbol=managed_order.order.symbol,
-                        side=sl_side,
-                        order_type='limit',
-                        quantity=managed_order.order.quantity,
-                        price=managed_order.stop_loss,
-                        strategy=f"{managed_order.strategy}_sl",
-                        metadata={'parent_order': managed_order.order.id, 'type': 'stop_loss'}
-                    )
-                    sl_order.parent_order_id = managed_order.order.id
-
-                # Создаем тейк-профит
-                if managed_order.take_profit:
-                    tp_side = 'sell' if managed_order.order.side == 'buy' else 'buy'
-                    tp_order = await self.place_order(
-                        symbol=managed_order.order.symbol,
-                        side=tp_side,
-                        order_type='limit',
-                        quantity=managed_order.order.quantity,
-                        price=managed_order.take_profit,
-                        strategy=f"{managed_order.strategy}_tp",
-                        metadata={'parent_order': managed_order.order.id, 'type': 'take_profit'}
-                    )
-                    tp_order.parent_order_id = managed_order.order.id
-
-                break
\ No newline at end of file
+        # Ждем исполнения основного ордера (без опроса - по событию смены статуса)
+        if managed_order.order.status not in _FILLED_STATUSES:
+            try:
+                await asyncio.wait_for(managed_order._settled.wait(), timeout=BRACKET_WAIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Ордер {managed_order.order.id} не исполнен за {BRACKET_WAIT_TIMEOUT}с, SL/TP не созданы")
+                return
+
+        if managed_order.order.status not in _FILLED_STATUSES:
+            return
+
+        close_side = 'sell' if managed_order.order.side == 'buy' else 'buy'
+
+        # Создаем стоп-лосс
+        if managed_order.stop_loss:
+            sl_order = await self.place_order(
+                symbol=managed_order.order.symbol,
+                side=close_side,
+                order_type='limit',
+                quantity=managed_order.order.quantity,
+                price=managed_order.stop_loss,
+                strategy=f"{managed_order.strategy}_sl",
+                metadata={'parent_order': managed_order.order.id, 'type': 'stop_loss'}
+            )
+            sl_order.parent_order_id = managed_order.order.id
+
+        # Создаем тейк-профит
+        if managed_order.take_profit:
+            tp_order = await self.place_order(
+                symbol=managed_order.order.symbol,
+                side=close_side,
+                order_type='limit',
+                quantity=managed_order.order.quantity,
+                price=managed_order.take_profit,
+                strategy=f"{managed_order.strategy}_tp",
+                metadata={'parent_order': managed_order.order.id, 'type': 'take_profit'}
+            )
+            tp_order.parent_order_id = managed_order.order.id
\ No newline at end of file
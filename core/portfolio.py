@@ -2,10 +2,12 @@
 """
 Управление портфелем и балансами
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional
+from types import MappingProxyType
 from decimal import Decimal
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import cached_property
 from loguru import logger
 import asyncio
 
@@ -38,14 +40,35 @@ class Position:
     pnl: Decimal = Decimal("0")
     pnl_percent: Decimal = Decimal("0")
 
+    @cached_property
+    def entry_price_float(self) -> float:
+        """Цена входа как float (кэшируется, цена входа не меняется)"""
+        return float(self.entry_price)
+
+    @cached_property
+    def quantity_float(self) -> float:
+        """Размер позиции как float (кэшируется)"""
+        return float(self.quantity)
+
+    @cached_property
+    def cost_basis(self) -> Decimal:
+        """Стоимость входа entry_price * quantity (кэшируется)"""
+        return self.entry_price * self.quantity
+
+    def reduce_quantity(self, amount: Decimal):
+        """Частичное закрытие - уменьшение размера со сбросом кэшированных значений"""
+        self.quantity -= amount
+        self.__dict__.pop('quantity_float', None)
+        self.__dict__.pop('cost_basis', None)
+
     def update_pnl(self, current_price: Decimal):
         """Обновление PnL"""
-        if self.side == 'long':
-            self.pnl = (current_price - self.entry_price) * self.quantity
-        else:
-            self.pnl = (self.entry_price - current_price) * self.quantity
+        price_change = current_price - self.entry_price
+        if self.side != 'long':
+            price_change = -price_change
 
-        self.pnl_percent = (self.pnl / (self.entry_price * self.quantity)) * 100
+        self.pnl = price_change * self.quantity
+        self.pnl_percent = self.pnl / self.cost_basis * 100
 
 
 class Portfolio:
@@ -55,10 +78,20 @@ class Portfolio:
         self.initial_balance = initial_balance
         self.assets: Dict[str, Asset] = {}
         self.positions: Dict[str, Position] = {}
+        self._positions_by_symbol: Dict[str, Position] = {}  # Индекс позиций по символу
+        self._position_ids_by_symbol: Dict[str, str] = {}
+        # Read-only представление индекса символ -> id позиции
+        self.position_ids_by_symbol: Mapping[str, str] = MappingProxyType(self._position_ids_by_symbol)
         self.total_value = initial_balance
         self.available_balance = initial_balance
         self._lock = asyncio.Lock()
 
+        # Нереализованный PnL ведется инкрементально, статистика кэшируется
+        # до следующего изменения портфеля
+        self._unrealized_pnl = Decimal("0")
+        self._stats_snapshot: Optional[Dict] = None
+
+
         # Инициализация с USDT
         self.assets['USDT'] = Asset(
             symbol='USDT',
@@ -84,13 +117,14 @@ class Portfolio:
                     total=total
                 )
 
+            self._stats_snapshot = None
             logger.debug(f"Обновлен баланс {symbol}: {free} (свободно) + {locked} (заблокировано)")
 
     async def open_position(self, position: Position) -> bool:
         """Открытие новой позиции"""
         async with self._lock:
             # Проверка доступного баланса
-            required_balance = position.entry_price * position.quantity
+            required_balance = position.cost_basis
 
             if self.assets['USDT'].free < required_balance:
                 logger.warning(
@@ -103,9 +137,16 @@ class Portfolio:
 
             # Добавление позиции
             self.positions[position.id] = position
+            if position.symbol not in self._positions_by_symbol:
+                self._index_position(position)
 
-            logger.info(
-                f"Открыта позиция {position.id}: {position.side} {position.quantity} {position.symbol} @ {position.entry_price}")
+            self._unrealized_pnl += position.pnl
+            self._stats_snapshot = None
+
+            logger.debug(
+                "Открыта позиция {}: {} {} {} @ {}",
+                position.id, position.side, position.quantity, position.symbol, position.entry_price
+            )
             return True
 
     async def close_position(self, position_id: str, close_price: Decimal) -> Optional[Position]:
@@ -116,33 +157,80 @@ class Portfolio:
                 return None
 
             position = self.positions[position_id]
+            self._unrealized_pnl -= position.pnl
             position.update_pnl(close_price)
 
-            # Расчет результата
-            if position.side == 'long':
-                result = position.entry_price * position.quantity + position.pnl
-            else:
-                result = position.entry_price * position.quantity + position.pnl
-
-            # Обновление баланса
-            self.assets['USDT'].locked -= position.entry_price * position.quantity
-            self.assets['USDT'].free += result
+            # Обновление баланса: разблокируем стоимость входа, возвращаем ее с PnL
+            self.assets['USDT'].locked -= position.cost_basis
+            self.assets['USDT'].free += position.cost_basis + position.pnl
             self.assets['USDT'].total = self.assets['USDT'].free + self.assets['USDT'].locked
 
             # Удаление позиции
             closed_position = self.positions.pop(position_id)
+            self._unindex_position(closed_position)
+            self._stats_snapshot = None
 
-            logger.info(f"Закрыта позиция {position_id}: PnL = {position.pnl} ({position.pnl_percent:.2f}%)")
+            logger.debug("Закрыта позиция {}: PnL = {} ({:.2f}%)", position_id, position.pnl, position.pnl_percent)
             return closed_position
 
+    def update_position_pnl(self, position: Position, current_price: Decimal):
+        """Обновление PnL открытой позиции с учетом в общем нереализованном PnL"""
+        old_pnl = position.pnl
+        position.update_pnl(current_price)
+
+        if position.id in self.positions:
+            self._unrealized_pnl += position.pnl - old_pnl
+            self._stats_snapshot = None
+
+    def reduce_position(self, position: Position, amount: Decimal):
+        """Частичное закрытие открытой позиции"""
+        position.reduce_quantity(amount)
+        self._stats_snapshot = None
+
+    def invalidate_stats(self):
+        """Сброс кэша статистики после изменения балансов вне методов портфеля"""
+        self._stats_snapshot = None
+
+    def get_position_by_symbol(self, symbol: str) -> Optional[Position]:
+        """Получение открытой позиции по символу"""
+        return self._positions_by_symbol.get(symbol)
+
+    def _index_position(self, position: Position):
+        """Добавление позиции в индекс по символу"""
+        self._positions_by_symbol[position.symbol] = position
+        self._position_ids_by_symbol[position.symbol] = position.id
+
+    def _unindex_position(self, position: Position):
+        """Удаление позиции из индекса по символу"""
+        if self._positions_by_symbol.get(position.symbol) is not position:
+            return
+
+        del self._positions_by_symbol[position.symbol]
+        del self._position_ids_by_symbol[position.symbol]
+
+        # Если по символу есть еще позиции - индексируем следующую
+        for other in self.positions.values():
+            if other.symbol == position.symbol:
+                self._index_position(other)
+                break
+
     async def get_portfolio_stats(self) -> Dict:
-        """Получение статистики портфеля"""
+        """Получение статистики портфеля
+
+        Снимок пересобирается после изменений портфеля, повторные чтения не
+        берут блокировку. Каждый вызов получает свою копию (обычные dict,
+        включая assets) - изменения вызывающего не попадают в снимок.
+        """
+        snapshot = self._stats_snapshot
+        if snapshot is not None:
+            return self._copy_stats(snapshot)
+
         async with self._lock:
             # Подсчет общей стоимости
             total_value = self.assets.get('USDT', Asset('USDT', Decimal("0"), Decimal("0"), Decimal("0"))).total
 
-            # Подсчет PnL по открытым позициям
-            unrealized_pnl = sum(pos.pnl for pos in self.positions.values())
+            # PnL по открытым позициям (ведется инкрементально)
+            unrealized_pnl = self._unrealized_pnl
 
             # Статистика
             stats = {
@@ -163,4 +251,12 @@ class Portfolio:
                 } for symbol, asset in self.assets.items()}
             }
 
-            return stats
\ No newline at end of file
+            self._stats_snapshot = stats
+            return self._copy_stats(stats)
+
+    @staticmethod
+    def _copy_stats(stats: Dict) -> Dict:
+        """Копия снимка статистики: верхний уровень и словари активов"""
+        copied = dict(stats)
+        copied["assets"] = {symbol: dict(asset) for symbol, asset in stats["assets"].items()}
+        return copied
\ No newline at end of file
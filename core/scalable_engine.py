@@ -3,17 +3,24 @@
 Масштабируемая архитектура торгового движка для приема депозитов
 """
 import asyncio
-from typing import Dict, List, Optional, Any
+import copy
+from collections import OrderedDict
+import numpy as np
+from typing import Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 from datetime import datetime
 from loguru import logger
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
 from config.settings import Settings
 from config.trading_config import TradingConfig
 from core.event_bus import EventBus, Event, EventType
+from core.portfolio import Portfolio
 from models.trading_signals import TradingSignal, MarketState
+from trading.strategies.ai_driven import AIDrivenStrategy
+from trading.strategies.simple_momentum import SimpleMomentumStrategy
+from utils.helpers import to_decimal
 
 
 class AccountType(str, Enum):
@@ -22,7 +29,7 @@ class AccountType(str, Enum):
     FUND = "fund"
 
 
-@dataclass
+@dataclass(slots=True)
 class ClientAccount:
     """Клиентский аккаунт"""
     id: str
@@ -36,6 +43,39 @@ class ClientAccount:
     created_at: datetime
     active: bool = True
 
+    # Float копии неизменяемых сумм для расчетов лимитов и статистики
+    initial_deposit_f: float = field(init=False, repr=False, compare=False)
+    fee_rate_f: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.initial_deposit_f = float(self.initial_deposit)
+        self.fee_rate_f = float(self.fee_rate)
+
+
+PERFORMANCE_HISTORY_DAYS = 365  # Дней дневной статистики в PerformanceTracker
+
+# Корректировка параметров стратегий под риск-профиль
+RISK_PROFILE_OVERRIDES: Dict[str, Dict[str, Any]] = {
+    'conservative': {
+        'position_size_percent': 1.0,  # 1% позиции
+        'min_confidence': 0.8,  # Высокая уверенность
+        'max_positions': 3,  # Максимум 3 позиции
+        'risk_multiplier': 0.5  # Сниженный риск
+    },
+    'moderate': {
+        'position_size_percent': 2.0,  # 2% позиции
+        'min_confidence': 0.7,  # Хорошая уверенность
+        'max_positions': 5,  # До 5 позиций
+        'risk_multiplier': 1.0  # Стандартный риск
+    },
+    'aggressive': {
+        'position_size_percent': 3.0,  # 3% позиции
+        'min_confidence': 0.6,  # Средняя уверенность
+        'max_positions': 8,  # До 8 позиций
+        'risk_multiplier': 1.5  # Увеличенный риск
+    }
+}
+
 
 class MultiAccountEngine:
     """Масштабируемый движок для управления несколькими аккаунтами"""
@@ -49,15 +89,26 @@ class MultiAccountEngine:
         self.accounts: Dict[str, ClientAccount] = {}
         self.account_portfolios = {}
         self.account_strategies = {}
+        self.account_active_strategies: Dict[str, List] = {}  # Пересобирается при изменении .active
 
         # Общие менеджеры
         self.exchange_manager = None
         self.market_analyzer = None
         self.risk_manager = None
 
+        # Конфигурации стратегий по риск-профилям
+        base_config = trading_config.technical_indicators
+        self._strategy_configs: Dict[str, Dict] = {
+            risk_profile: {**base_config, **overrides}
+            for risk_profile, overrides in RISK_PROFILE_OVERRIDES.items()
+        }
+
         # Статистика
         self.performance_tracker = PerformanceTracker()
 
+        # Уведомления аккаунтов, отправляемые пачкой в конце торгового цикла
+        self._pending_notifications: List[Tuple[ClientAccount, str, str, datetime]] = []
+
         self.is_running = False
 
     async def initialize(self):
@@ -67,6 +118,11 @@ class MultiAccountEngine:
         # Инициализация общих компонентов
         await self.event_bus.start()
 
+        # Eager задачи (Python 3.12+): короткие корутины завершаются без прохода через планировщик
+        eager_task_factory = getattr(asyncio, 'eager_task_factory', None)
+        if eager_task_factory is not None:
+            asyncio.get_running_loop().set_task_factory(eager_task_factory)
+
         # Загрузка существующих аккаунтов
         await self._load_client_accounts()
 
@@ -99,15 +155,17 @@ class MultiAccountEngine:
     async def add_client_account(self, account_data: Dict) -> str:
         """Добавление нового клиентского аккаунта"""
 
+        deposit = to_decimal(account_data['deposit'])
+
         account = ClientAccount(
             id=f"client_{len(self.accounts) + 1:03d}",
             name=account_data['name'],
             account_type=AccountType.CLIENT,
-            initial_deposit=Decimal(str(account_data['deposit'])),
-            current_balance=Decimal(str(account_data['deposit'])),
+            initial_deposit=deposit,
+            current_balance=deposit,
             allocated_strategies=account_data.get('strategies', ["AI_Driven"]),
             risk_profile=account_data.get('risk_profile', 'moderate'),
-            fee_rate=Decimal(str(account_data.get('fee_rate', '0.20'))),  # 20% комиссия по умолчанию
+            fee_rate=to_decimal(account_data.get('fee_rate', '0.20')),  # 20% комиссия по умолчанию
             created_at=datetime.utcnow()
         )
 
@@ -122,8 +180,6 @@ class MultiAccountEngine:
 
     async def _create_account_portfolio(self, account: ClientAccount):
         """Создание портфеля для аккаунта"""
-        from core.portfolio import Portfolio
-
         # Создаем изолированный портфель для каждого аккаунта
         portfolio = Portfolio(initial_balance=account.current_balance)
         self.account_portfolios[account.id] = portfolio
@@ -131,6 +187,25 @@ class MultiAccountEngine:
         # Настройка стратегий для аккаунта
         strategies = await self._setup_account_strategies(account)
         self.account_strategies[account.id] = strategies
+        self._rebuild_active_strategies(account.id)
+
+    def _rebuild_active_strategies(self, account_id: str):
+        """Пересборка списка активных стратегий аккаунта"""
+        self.account_active_strategies[account_id] = [
+            strategy for strategy in self.account_strategies.get(account_id, []) if strategy.active
+        ]
+
+    def toggle_account_strategy(self, account_id: str, strategy_name: str, active: bool) -> bool:
+        """Включение/выключение стратегии аккаунта"""
+        for strategy in self.account_strategies.get(account_id, []):
+            if strategy.name == strategy_name:
+                strategy.active = active
+                self._rebuild_active_strategies(account_id)
+                logger.info(f"🎯 Стратегия {strategy_name} аккаунта {account_id}: {'включена' if active else 'выключена'}")
+                return True
+
+        logger.warning(f"⚠️ Стратегия {strategy_name} аккаунта {account_id} не найдена")
+        return False
 
     async def _setup_account_strategies(self, account: ClientAccount) -> List:
         """Настройка стратегий для аккаунта"""
@@ -141,10 +216,8 @@ class MultiAccountEngine:
             strategy_config = self._get_strategy_config(strategy_name, account.risk_profile)
 
             if strategy_name == "AI_Driven":
-                from trading.strategies.ai_driven import AIDrivenStrategy
                 strategy = AIDrivenStrategy(strategy_config, self.event_bus)
             elif strategy_name == "SimpleMomentum":
-                from trading.strategies.simple_momentum import SimpleMomentumStrategy
                 strategy = SimpleMomentumStrategy(strategy_config)
 
             strategy.account_id = account.id  # Привязка к аккаунту
@@ -154,35 +227,13 @@ class MultiAccountEngine:
         return strategies
 
     def _get_strategy_config(self, strategy_name: str, risk_profile: str) -> Dict:
-        """Получение конфигурации стратегии для риск-профиля"""
-
-        base_config = self.trading_config.technical_indicators.copy()
+        """Получение конфигурации стратегии для риск-профиля
 
-        # Корректировка под риск-профиль
-        if risk_profile == "conservative":
-            return {
-                **base_config,
-                'position_size_percent': 1.0,  # 1% позиции
-                'min_confidence': 0.8,  # Высокая уверенность
-                'max_positions': 3,  # Максимум 3 позиции
-                'risk_multiplier': 0.5  # Сниженный риск
-            }
-        elif risk_profile == "aggressive":
-            return {
-                **base_config,
-                'position_size_percent': 3.0,  # 3% позиции
-                'min_confidence': 0.6,  # Средняя уверенность
-                'max_positions': 8,  # До 8 позиций
-                'risk_multiplier': 1.5  # Увеличенный риск
-            }
-        else:  # moderate
-            return {
-                **base_config,
-                'position_size_percent': 2.0,  # 2% позиции
-                'min_confidence': 0.7,  # Хорошая уверенность
-                'max_positions': 5,  # До 5 позиций
-                'risk_multiplier': 1.0  # Стандартный риск
-            }
+        Конфигурации собираются один раз в __init__, каждая стратегия получает
+        свою копию: BaseStrategy.config изменяется на месте (config.update) и не
+        должен влиять на стратегии других аккаунтов. Неизвестный профиль - moderate.
+        """
+        return copy.deepcopy(self._strategy_configs.get(risk_profile, self._strategy_configs['moderate']))
 
     async def start_trading(self):
         """Запуск торговли для всех аккаунтов"""
@@ -209,70 +260,112 @@ class MultiAccountEngine:
     async def _trading_cycle(self):
         """Основной торговый цикл для всех аккаунтов"""
         try:
+            # Единое время цикла для состояний рынка и статистики
+            now = datetime.utcnow()
+
             # Анализ рынка (общий для всех аккаунтов)
-            market_analysis = await self._perform_market_analysis()
+            market_analysis = await self._perform_market_analysis(now)
 
-            # Торговля для каждого активного аккаунта
-            for account_id, account in self.accounts.items():
-                if not account.active:
-                    continue
+            # Кэшированный AI анализ берется один раз на символ для всех аккаунтов
+            cached_analyses = {}
+            for symbol in market_analysis:
+                cached_analysis = self.market_analyzer.get_cached_analysis(symbol)
+                if cached_analysis:
+                    cached_analyses[symbol] = cached_analysis
 
-                await self._trade_for_account(account_id, market_analysis)
+            # Торговля для активных аккаунтов параллельно - портфели изолированы
+            async with asyncio.TaskGroup() as task_group:
+                for account_id, account in self.accounts.items():
+                    if account.active:
+                        task_group.create_task(self._trade_for_account(account_id, cached_analyses))
 
             # Обновление общей статистики
-            await self.performance_tracker.update_stats(self.accounts, self.account_portfolios)
+            await self.performance_tracker.update_stats(self.accounts, self.account_portfolios, now)
+
+            # Отправка накопленных за цикл уведомлений
+            await self._flush_account_notifications()
 
         except Exception as e:
             logger.error(f"❌ Ошибка в торговом цикле: {e}")
 
-    async def _perform_market_analysis(self) -> Dict[str, MarketState]:
-        """Общий анализ рынка для всех торговых пар"""
+    async def _perform_market_analysis(self, now: Optional[datetime] = None) -> Dict[str, MarketState]:
+        """Общий анализ рынка для всех торговых пар - пары анализируются параллельно"""
+        now = now or datetime.utcnow()
+        needed_symbols = self._needed_symbols()
+        symbols = [
+            pair.symbol for pair in self.trading_config.trading_pairs
+            if pair.enabled and (needed_symbols is None or pair.symbol in needed_symbols)
+        ]
+        results = await asyncio.gather(
+            *(self._analyze_pair(symbol, now) for symbol in symbols),
+            return_exceptions=True
+        )
+
         market_states = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Ошибка анализа {symbol}: {result}")
+            elif result is not None:
+                market_states[symbol] = result
+
+        return market_states
 
-        for trading_pair in self.trading_config.trading_pairs:
-            if not trading_pair.enabled:
+    def _needed_symbols(self) -> Optional[set]:
+        """Символы, нужные активным стратегиям активных аккаунтов
+
+        None - нужны все торговые пары (стратегия без собственного списка symbols).
+        """
+        needed = set()
+        for account_id, account in self.accounts.items():
+            if not account.active:
                 continue
 
-            try:
-                # Получение рыночных данных
-                market_data = await self.exchange_manager.get_market_data(
-                    trading_pair.symbol,
-                    self.trading_config.primary_timeframe,
-                    100
-                )
+            for strategy in self.account_active_strategies.get(account_id, ()):
+                strategy_symbols = getattr(strategy, 'symbols', None)
+                if strategy_symbols is None:
+                    return None
+                needed.update(strategy_symbols)
 
-                if not market_data.empty:
-                    # Создание состояния рынка
-                    current_price = Decimal(str(market_data['close'].iloc[-1]))
-                    volume_24h = Decimal(str(market_data['volume'].sum()))
-                    price_change = float(
-                        (market_data['close'].iloc[-1] - market_data['close'].iloc[0]) / market_data['close'].iloc[
-                            0] * 100)
+        return needed
 
-                    market_state = MarketState(
-                        symbol=trading_pair.symbol,
-                        current_price=current_price,
-                        volume_24h=volume_24h,
-                        price_change_24h=price_change,
-                        timestamp=datetime.utcnow()
-                    )
+    async def _analyze_pair(self, symbol: str, now: datetime) -> Optional[MarketState]:
+        """Состояние рынка и AI анализ одной торговой пары"""
 
-                    market_states[trading_pair.symbol] = market_state
+        # Получение рыночных данных
+        market_data = await self.exchange_manager.get_market_data(
+            symbol,
+            self.trading_config.primary_timeframe,
+            100
+        )
 
-                    # Запуск AI анализа
-                    await self.market_analyzer.analyze_symbol(trading_pair.symbol)
+        if market_data.empty:
+            return None
+
+        # Создание состояния рынка - работа напрямую с массивами numpy
+        close = market_data['close'].to_numpy()
+        last_price = float(close[-1])
+        first_price = float(close[0])
+        volume_24h = float(market_data['volume'].to_numpy().sum())
+
+        market_state = MarketState(
+            symbol=symbol,
+            current_price=to_decimal(last_price),
+            volume_24h=to_decimal(volume_24h),
+            price_change_24h=(last_price - first_price) / first_price * 100,
+            timestamp=now
+        )
 
-            except Exception as e:
-                logger.error(f"❌ Ошибка анализа {trading_pair.symbol}: {e}")
+        # Запуск AI анализа
+        await self.market_analyzer.analyze_symbol(symbol)
 
-        return market_states
+        return market_state
 
-    async def _trade_for_account(self, account_id: str, market_analysis: Dict[str, MarketState]):
+    async def _trade_for_account(self, account_id: str, cached_analyses: Dict[str, Dict]):
         """Торговля для конкретного аккаунта"""
         try:
             account = self.accounts[account_id]
             portfolio = self.account_portfolios[account_id]
-            strategies = self.account_strategies[account_id]
+            strategies = self.account_active_strategies[account_id]
 
             # Получение статистики портфеля
             portfolio_stats = await portfolio.get_portfolio_stats()
@@ -282,30 +375,23 @@ class MultiAccountEngine:
                 logger.warning(f"⚠️ Аккаунт {account.name} превысил лимиты")
                 return
 
-            # Выполнение стратегий для аккаунта
+            # Выполнение активных стратегий аккаунта
             for strategy in strategies:
-                if not strategy.active:
-                    continue
-
-                await self._execute_strategy_for_account(account_id, strategy, market_analysis)
+                await self._execute_strategy_for_account(account_id, strategy, cached_analyses)
 
         except Exception as e:
             logger.error(f"❌ Ошибка торговли для аккаунта {account_id}: {e}")
 
-    async def _execute_strategy_for_account(self, account_id: str, strategy, market_analysis: Dict[str, MarketState]):
-        """Выполнение стратегии для аккаунта"""
+    async def _execute_strategy_for_account(self, account_id: str, strategy, cached_analyses: Dict[str, Dict]):
+        """Выполнение стратегии для аккаунта по кэшированному анализу символов"""
         try:
-            for symbol, market_state in market_analysis.items():
-                # Получение анализа из кэша
-                cached_analysis = self.market_analyzer.get_cached_analysis(symbol)
-
-                if cached_analysis:
-                    # Проверка условий стратегии
-                    if await strategy.should_enter(cached_analysis['ai_analysis']):
-                        await self._open_position_for_account(account_id, symbol, cached_analysis, strategy)
+            for symbol, cached_analysis in cached_analyses.items():
+                # Проверка условий стратегии
+                if await strategy.should_enter(cached_analysis['ai_analysis']):
+                    await self._open_position_for_account(account_id, symbol, cached_analysis, strategy)
 
-                    # Проверка условий выхода из существующих позиций
-                    await self._check_exit_conditions_for_account(account_id, symbol, cached_analysis, strategy)
+                # Проверка условий выхода из существующих позиций
+                await self._check_exit_conditions_for_account(account_id, symbol, cached_analysis, strategy)
 
         except Exception as e:
             logger.error(f"❌ Ошибка выполнения стратегии {strategy.name} для аккаунта {account_id}: {e}")
@@ -332,7 +418,7 @@ class MultiAccountEngine:
                 logger.info(f"📈 Открыта позиция для {account.name}: {symbol} {analysis['ai_analysis']['action']}")
 
                 # Уведомление в Telegram
-                await self._send_account_notification(account, f"Открыта позиция {symbol}", "position_opened")
+                self._send_account_notification(account, f"Открыта позиция {symbol}", "position_opened")
 
         except Exception as e:
             logger.error(f"❌ Ошибка открытия позиции для аккаунта {account_id}: {e}")
@@ -360,7 +446,7 @@ class MultiAccountEngine:
             # Примерная цена (нужно получать из анализа)
             estimated_price = 45000  # Заглушка
 
-            return Decimal(str(position_value / estimated_price))
+            return to_decimal(position_value / estimated_price)
 
         except Exception as e:
             logger.error(f"❌ Ошибка расчета размера позиции: {e}")
@@ -370,7 +456,7 @@ class MultiAccountEngine:
         """Проверка лимитов для аккаунта"""
         try:
             current_balance = float(portfolio_stats['total_value'])
-            initial_balance = float(account.initial_deposit)
+            initial_balance = account.initial_deposit_f
 
             # Проверка максимальной просадки
             drawdown_percent = ((initial_balance - current_balance) / initial_balance) * 100
@@ -403,20 +489,21 @@ class MultiAccountEngine:
 
             # Расчет комиссии
             profit = float(portfolio_stats['total_pnl'])
+            current_balance = float(portfolio_stats['total_value'])
+            initial_deposit = account.initial_deposit_f
             commission = 0
 
             if profit > 0 and account.account_type == AccountType.CLIENT:
-                commission = profit * float(account.fee_rate)
+                commission = profit * account.fee_rate_f
 
             return {
                 'account_id': account_id,
                 'account_name': account.name,
                 'account_type': account.account_type.value,
-                'initial_deposit': float(account.initial_deposit),
-                'current_balance': float(portfolio_stats['total_value']),
+                'initial_deposit': initial_deposit,
+                'current_balance': current_balance,
                 'total_pnl': profit,
-                'pnl_percent': ((float(portfolio_stats['total_value']) - float(account.initial_deposit)) / float(
-                    account.initial_deposit)) * 100,
+                'pnl_percent': (current_balance - initial_deposit) / initial_deposit * 100,
                 'commission_owed': commission,
                 'net_profit': profit - commission,
                 'positions_count': portfolio_stats['positions_count'],
@@ -430,16 +517,27 @@ class MultiAccountEngine:
             return {'error': str(e)}
 
     async def get_all_accounts_performance(self) -> List[Dict]:
-        """Получение производительности всех аккаунтов"""
-        performances = []
-
-        for account_id in self.accounts.keys():
-            performance = await self.get_account_performance(account_id)
-            performances.append(performance)
+        """Получение производительности всех аккаунтов (параллельно, в порядке аккаунтов)"""
+        return list(await asyncio.gather(*(
+            self.get_account_performance(account_id) for account_id in self.accounts
+        )))
+
+    def _send_account_notification(self, account: ClientAccount, message: str, notification_type: str):
+        """Постановка уведомления для аккаунта в очередь - отправка в конце цикла"""
+        self._pending_notifications.append((account, message, notification_type, datetime.utcnow()))
+
+    async def _flush_account_notifications(self):
+        """Отправка всех накопленных уведомлений"""
+        if not self._pending_notifications:
+            return
 
-        return performances
+        pending, self._pending_notifications = self._pending_notifications, []
+        await asyncio.gather(*(
+            self._deliver_account_notification(*notification) for notification in pending
+        ))
 
-    async def _send_account_notification(self, account: ClientAccount, message: str, notification_type: str):
+    async def _deliver_account_notification(self, account: ClientAccount, message: str,
+                                            notification_type: str, created_at: datetime):
         """Отправка уведомления для аккаунта"""
         try:
             # Здесь будет интеграция с системой уведомлений
@@ -454,6 +552,9 @@ class MultiAccountEngine:
         logger.info("🛑 Остановка масштабируемого торгового движка")
         self.is_running = False
 
+        # Уведомления, не отправленные в последнем цикле
+        await self._flush_account_notifications()
+
         # Сохранение статистики всех аккаунтов
         final_performance = await self.get_all_accounts_performance()
         logger.info(f"📊 Финальная производительность аккаунтов: {len(final_performance)} аккаунтов")
@@ -469,44 +570,50 @@ class PerformanceTracker:
     """Отслеживание производительности системы"""
 
     def __init__(self):
-        self.daily_stats = {}
+        self.daily_stats: OrderedDict = OrderedDict()
         self.monthly_stats = {}
+        self._latest_stats: Optional[Dict] = None
 
-    async def update_stats(self, accounts: Dict[str, ClientAccount], portfolios: Dict):
-        """Обновление статистики"""
+    async def update_stats(self, accounts: Dict[str, ClientAccount], portfolios: Dict,
+                           now: Optional[datetime] = None):
+        """Обновление статистики (now - время торгового цикла)"""
         try:
-            today = datetime.utcnow().date()
-
-            total_balance = 0
-            total_profit = 0
-            active_accounts = 0
-
-            for account_id, account in accounts.items():
-                if account.active and account_id in portfolios:
-                    portfolio = portfolios[account_id]
-                    stats = await portfolio.get_portfolio_stats()
-
-                    total_balance += float(stats['total_value'])
-                    total_profit += float(stats['total_pnl'])
-                    active_accounts += 1
-
-            self.daily_stats[today] = {
-                'total_balance': total_balance,
-                'total_profit': total_profit,
-                'active_accounts': active_accounts,
-                'timestamp': datetime.utcnow()
+            now = now or datetime.utcnow()
+            today = now.date()
+
+            # Статистика портфелей собирается параллельно, суммы - векторно
+            all_stats = await asyncio.gather(*(
+                portfolios[account_id].get_portfolio_stats()
+                for account_id, account in accounts.items()
+                if account.active and account_id in portfolios
+            ))
+
+            balances = np.fromiter((float(stats['total_value']) for stats in all_stats),
+                                   dtype=np.float64, count=len(all_stats))
+            profits = np.fromiter((float(stats['total_pnl']) for stats in all_stats),
+                                  dtype=np.float64, count=len(all_stats))
+
+            self._latest_stats = {
+                'total_balance': float(balances.sum()),
+                'total_profit': float(profits.sum()),
+                'active_accounts': balances.size,
+                'timestamp': now
             }
+            self.daily_stats[today] = self._latest_stats
+
+            # Храним ограниченную историю по дням
+            while len(self.daily_stats) > PERFORMANCE_HISTORY_DAYS:
+                self.daily_stats.popitem(last=False)
 
         except Exception as e:
             logger.error(f"❌ Ошибка обновления статистики: {e}")
 
     def get_performance_summary(self) -> Dict:
         """Получение сводки производительности"""
-        if not self.daily_stats:
+        latest_stats = self._latest_stats
+        if latest_stats is None:
             return {'error': 'No performance data available'}
 
-        latest_stats = list(self.daily_stats.values())[-1]
-
         return {
             'total_accounts': latest_stats['active_accounts'],
             'total_aum': latest_stats['total_balance'],  # Assets Under Management
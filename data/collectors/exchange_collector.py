@@ -1,9 +1,26 @@
 # data/collectors/exchange_collector.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
 import ccxt.pro as ccxt
+import aiohttp
+import certifi
+import ssl
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+
+MAX_OHLCV_CONCURRENCY = 8  # Одновременных запросов OHLCV в get_ohlcv_many
+OHLCV_STREAM_RETRY_DELAY = 5  # секунд до переподключения websocket потока свечей
+SESSION_CONNECTION_LIMIT = 32  # Соединений в общем пуле HTTP сессии биржи
+SESSION_DNS_CACHE_TTL = 300  # секунд
+SESSION_KEEPALIVE_TIMEOUT = 60  # секунд
+MARKETS_CACHE_DIR = Path.home() / '.cache' / 'crypto-ai'  # Суточный кэш load_markets на диске
 
 
 class ExchangeError(Exception):
@@ -19,11 +36,22 @@ class DataError(Exception):
 class ExchangeDataCollector:
     """Сборщик данных с криптобирж - исправленная версия"""
 
+    # Общие HTTP сессии по имени биржи и число использующих их сборщиков
+    _sessions: Dict[str, aiohttp.ClientSession] = {}
+    _session_refs: Dict[str, int] = {}
+
     def __init__(self, exchange_name: str, api_key: str = None,
                  api_secret: str = None, testnet: bool = True):
         self.exchange_name = exchange_name
         self.testnet = testnet
         self.exchange = None
+        self._shared_session: Optional[str] = None
+
+        # Кольцевые буферы свечей по (символ, таймфрейм), наполняемые websocket потоком
+        self._buffers: Dict[Tuple[str, str], deque] = {}
+        self._streams: Dict[Tuple[str, str], asyncio.Task] = {}
+        # Время (monotonic) последнего успешного обновления буфера потоком
+        self._last_push: Dict[Tuple[str, str], float] = {}
 
         try:
             # Создание объекта биржи
@@ -60,6 +88,11 @@ class ExchangeDataCollector:
                     'adjustForTimeDifference': True
                 }
 
+            # Общий пул соединений: TLS рукопожатие один раз на биржу, а не на сборщик
+            session = self._acquire_session(exchange_name.lower())
+            if session is not None:
+                config['session'] = session
+
             self.exchange = exchange_class(config)
 
         except AttributeError:
@@ -67,6 +100,87 @@ class ExchangeDataCollector:
         except Exception as e:
             raise ExchangeError(f"Ошибка подключения к {exchange_name}: {e}")
 
+    def _acquire_session(self, key: str) -> Optional[aiohttp.ClientSession]:
+        """Общая HTTP сессия для биржи (только внутри запущенного event loop)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Без event loop сессию создать нельзя - ccxt откроет свою при первом запросе
+            return None
+
+        cls = type(self)
+        session = cls._sessions.get(key)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                ssl=ssl.create_default_context(cafile=certifi.where()),
+                limit=SESSION_CONNECTION_LIMIT,
+                ttl_dns_cache=SESSION_DNS_CACHE_TTL,
+                keepalive_timeout=SESSION_KEEPALIVE_TIMEOUT
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            cls._sessions[key] = session
+            cls._session_refs[key] = 0
+
+        cls._session_refs[key] += 1
+        self._shared_session = key
+        return session
+
+    async def _release_session(self):
+        """Освобождение общей сессии, закрытие после последнего сборщика"""
+        key = self._shared_session
+        if key is None:
+            return
+        self._shared_session = None
+
+        cls = type(self)
+        cls._session_refs[key] -= 1
+        if cls._session_refs[key] <= 0:
+            del cls._session_refs[key]
+            session = cls._sessions.pop(key)
+            await session.close()
+
+    def _markets_cache_path(self) -> Path:
+        """Файл кэша рынков: биржа, режим и текущие сутки"""
+        mode = 'testnet' if self.testnet else 'mainnet'
+        day = datetime.utcnow().strftime('%Y%m%d')
+        return MARKETS_CACHE_DIR / f"{self.exchange_name.lower()}_{mode}_{day}.json"
+
+    async def _ensure_markets(self):
+        """Загрузка рынков: из памяти, из суточного кэша на диске или с биржи"""
+        if hasattr(self.exchange, 'markets') and self.exchange.markets:
+            return
+
+        path = self._markets_cache_path()
+        if path.exists():
+            try:
+                cached = json.loads(await asyncio.to_thread(path.read_bytes))
+                self.exchange.set_markets(cached['markets'], cached.get('currencies'))
+                logger.debug(f"Рынки {self.exchange_name} загружены из кэша {path}")
+                return
+            except Exception as e:
+                logger.warning(f"Кэш рынков {path} поврежден: {e}")
+
+        await self.exchange.load_markets()
+        await self._save_markets_cache()
+
+    async def _save_markets_cache(self):
+        """Запись рынков в кэш текущих суток и удаление файлов за прошлые дни"""
+        path = self._markets_cache_path()
+        try:
+            payload = json.dumps({
+                'markets': self.exchange.markets,
+                'currencies': getattr(self.exchange, 'currencies', None)
+            }, default=str)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(path.write_text, payload)
+
+            prefix = path.name.rsplit('_', 1)[0]
+            for stale in path.parent.glob(f"{prefix}_*.json"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить кэш рынков {path}: {e}")
+
     async def get_ohlcv(self, symbol: str, timeframe: str = '5m',
                         limit: int = 100) -> pd.DataFrame:
         """Получение OHLCV данных с улучшенной обработкой ошибок"""
@@ -75,9 +189,12 @@ class ExchangeDataCollector:
             if not self.exchange:
                 raise DataError("Exchange не инициализирован")
 
+            # Свечи из websocket потока, если буфер заполнен и поток живой
+            if self._stream_is_fresh(symbol, timeframe, limit):
+                return self._to_dataframe(list(self._buffers[(symbol, timeframe)])[-limit:])
+
             # Загружаем рынки если еще не загружены
-            if not hasattr(self.exchange, 'markets') or not self.exchange.markets:
-                await self.exchange.load_markets()
+            await self._ensure_markets()
 
             # Получаем данные
             ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
@@ -85,9 +202,7 @@ class ExchangeDataCollector:
             if not ohlcv:
                 raise DataError(f"Нет данных для {symbol}")
 
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+            df = self._to_dataframe(ohlcv)
 
             logger.debug(f"Получено {len(df)} свечей для {symbol}")
             return df
@@ -97,6 +212,93 @@ class ExchangeDataCollector:
             # Возвращаем пустой DataFrame вместо исключения
             return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume'])
 
+    @staticmethod
+    def _to_dataframe(ohlcv: List[List]) -> pd.DataFrame:
+        """Свечи ccxt [timestamp, open, high, low, close, volume] -> DataFrame с индексом по времени
+
+        Один float64 массив и готовые колонки без вывода типов по списку списков.
+        """
+        arr = np.asarray(ohlcv, dtype=np.float64)
+        index = pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms')
+        index.name = 'timestamp'
+        return pd.DataFrame({
+            'open': arr[:, 1],
+            'high': arr[:, 2],
+            'low': arr[:, 3],
+            'close': arr[:, 4],
+            'volume': arr[:, 5]
+        }, index=index)
+
+    def _stream_is_fresh(self, symbol: str, timeframe: str, limit: int) -> bool:
+        """Буфер потока пригоден: заполнен и обновлялся не позже одного таймфрейма назад
+
+        Если websocket отвалился и переподключается, get_ohlcv уходит в REST
+        вместо устаревших свечей.
+        """
+        key = (symbol, timeframe)
+        buffer = self._buffers.get(key)
+        if buffer is None or len(buffer) < limit:
+            return False
+
+        age = time.monotonic() - self._last_push.get(key, float('-inf'))
+        return age <= ccxt.Exchange.parse_timeframe(timeframe)
+
+    def start_ohlcv_stream(self, symbol: str, timeframe: str = '5m', limit: int = 100):
+        """Запуск фонового websocket потока свечей для get_ohlcv"""
+        key = (symbol, timeframe)
+        if key not in self._streams:
+            self._streams[key] = asyncio.create_task(self.stream_ohlcv(symbol, timeframe, limit))
+
+    async def stream_ohlcv(self, symbol: str, timeframe: str = '5m', limit: int = 100):
+        """Поток свечей через watch_ohlcv в кольцевой буфер
+
+        Буфер заполняется одним REST запросом, дальше websocket присылает только
+        новые и обновленные свечи.
+        """
+        key = (symbol, timeframe)
+
+        while True:
+            try:
+                if key not in self._buffers:
+                    ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+                    self._buffers[key] = deque(ohlcv, maxlen=limit)
+                    self._last_push[key] = time.monotonic()
+
+                buffer = self._buffers[key]
+                for candle in await self.exchange.watch_ohlcv(symbol, timeframe):
+                    self._merge_candle(buffer, candle)
+                self._last_push[key] = time.monotonic()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка потока OHLCV для {symbol}: {e}")
+                await asyncio.sleep(OHLCV_STREAM_RETRY_DELAY)
+
+    @staticmethod
+    def _merge_candle(buffer: deque, candle: List):
+        """Обновление текущей свечи или добавление новой"""
+        if buffer and buffer[-1][0] == candle[0]:
+            buffer[-1] = candle
+        elif not buffer or candle[0] > buffer[-1][0]:
+            buffer.append(candle)
+
+    async def get_ohlcv_many(self, symbols: List[str], timeframe: str = '5m', limit: int = 100,
+                             max_concurrency: int = MAX_OHLCV_CONCURRENCY) -> Dict[str, pd.DataFrame]:
+        """Параллельное получение OHLCV для нескольких символов
+
+        Одновременно выполняется не более max_concurrency запросов (лимиты биржи).
+        Для символа с ошибкой возвращается пустой DataFrame, как в get_ohlcv.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch_symbol(symbol: str) -> pd.DataFrame:
+            async with semaphore:
+                return await self.get_ohlcv(symbol, timeframe, limit)
+
+        frames = await asyncio.gather(*(fetch_symbol(symbol) for symbol in symbols))
+        return dict(zip(symbols, frames))
+
     async def get_ticker(self, symbol: str) -> Dict:
         """Получение тикера с обработкой ошибок"""
         try:
@@ -104,8 +306,7 @@ class ExchangeDataCollector:
                 raise DataError("Exchange не инициализирован")
 
             # Загружаем рынки если еще не загружены
-            if not hasattr(self.exchange, 'markets') or not self.exchange.markets:
-                await self.exchange.load_markets()
+            await self._ensure_markets()
 
             ticker = await self.exchange.fetch_ticker(symbol)
             return ticker
@@ -139,8 +340,9 @@ class ExchangeDataCollector:
                 logger.error("Exchange объект не создан")
                 return False
 
-            # Попытка загрузить рынки
-            await asyncio.wait_for(self.exchange.load_markets(), timeout=30.0)
+            # Попытка загрузить рынки - всегда с биржи, кэш на диске только обновляется
+            await asyncio.wait_for(self.exchange.load_markets(reload=True), timeout=30.0)
+            await self._save_markets_cache()
 
             # Проверяем что рынки загружены
             if not self.exchange.markets:
@@ -159,9 +361,16 @@ class ExchangeDataCollector:
 
     async def close(self):
         """Закрытие соединения"""
+        for task in self._streams.values():
+            task.cancel()
+        await asyncio.gather(*self._streams.values(), return_exceptions=True)
+        self._streams.clear()
+
         if self.exchange:
             try:
                 await self.exchange.close()
                 logger.debug(f"Соединение с {self.exchange_name} закрыто")
             except Exception as e:
-                logger.error(f"Ошибка закрытия соединения с {self.exchange_name}: {e}")
\ No newline at end of file
+                logger.error(f"Ошибка закрытия соединения с {self.exchange_name}: {e}")
+
+        await self._release_session()
\ No newline at end of file
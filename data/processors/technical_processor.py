@@ -1,9 +1,330 @@
 # data/processors/technical_processor.py
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, Mapping, Optional
 from loguru import logger
 
+from utils.jit import njit, NUMBA_AVAILABLE
+
+
+# Ядра ниже обрабатывают пропуски (NaN/inf) как pandas, поэтому компилируются
+# без fastmath: с ним LLVM вправе считать, что NaN во входных данных нет.
+
+
+@njit(cache=True)
+def _rsi_value(avg_gain: float, avg_loss: float) -> float:
+    """RSI по средним приросту/убытку (без убытков - 100, плоская цена - 50)"""
+    if avg_loss == 0.0:
+        return 100.0 if avg_gain > 0.0 else 50.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+@njit(cache=True)
+def _rsi_step(delta: float, period: int, count: int, avg_gain: float, avg_loss: float):
+    """Шаг сглаживания Уайлдера по изменению цены (пропуски не учитываются)
+
+    Первые period изменений дают простое среднее, далее
+    avg = (avg * (period - 1) + value) / period.
+    """
+    if not np.isfinite(delta):
+        return count, avg_gain, avg_loss
+
+    gain = delta if delta > 0 else 0.0
+    loss = -delta if delta < 0 else 0.0
+    count += 1
+    if count <= period:
+        avg_gain += gain / period
+        avg_loss += loss / period
+    else:
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return count, avg_gain, avg_loss
+
+
+@njit(cache=True)
+def _ema_step(x: float, alpha: float, ema: float, old_weight: float):
+    """Шаг EMA (adjust=False) как в pandas ewm
+
+    До первого наблюдения ema = NaN. Пропуск не меняет значение, но уменьшает
+    вес накопленного среднего при следующем наблюдении.
+    """
+    if ema != ema:
+        if np.isfinite(x):
+            return x, 1.0
+        return ema, old_weight
+
+    old_weight *= 1.0 - alpha
+    if np.isfinite(x):
+        ema = (old_weight * ema + alpha * x) / (old_weight + alpha)
+        old_weight = 1.0
+    return ema, old_weight
+
+
+@njit(cache=True)
+def _window_step(values: np.ndarray, i: int, period: int, count: int, mean: float, m2: float):
+    """Шаг скользящего окна Уэлфорда: вытеснение values[i - period] и добавление values[i]
+
+    Пропуски в окно не попадают; count - число значений в окне, окно полное
+    (как min_periods=period в pandas), когда count == period.
+    """
+    if i >= period:
+        old = values[i - period]
+        if np.isfinite(old):
+            count -= 1
+            if count == 0:
+                mean = 0.0
+                m2 = 0.0
+            else:
+                delta = old - mean
+                mean -= delta / count
+                m2 -= delta * (old - mean)
+
+    x = values[i]
+    if np.isfinite(x):
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+
+    return count, mean, m2
+
+
+@njit(cache=True)
+def _vwap_step(high: float, low: float, close: float, volume: float, sum_pv: float, sum_v: float):
+    """Шаг накопительного VWAP как cumsum в pandas: пропуски не суммируются, а дают NaN"""
+    pv = (high + low + close) / 3.0 * volume
+    pv_ok = np.isfinite(pv)
+    v_ok = np.isfinite(volume)
+    if pv_ok:
+        sum_pv += pv
+    if v_ok:
+        sum_v += volume
+
+    value = sum_pv / sum_v if pv_ok and v_ok and sum_v != 0.0 else np.nan
+    return value, sum_pv, sum_v
+
+
+@njit(cache=True)
+def _rsi_wilder(close: np.ndarray, period: int) -> np.ndarray:
+    """RSI со сглаживанием Уайлдера за один проход"""
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+
+    count = 0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        count, avg_gain, avg_loss = _rsi_step(delta, period, count, avg_gain, avg_loss)
+        if np.isfinite(delta) and count >= period:
+            rsi[i] = _rsi_value(avg_gain, avg_loss)
+
+    return rsi
+
+
+@njit(cache=True)
+def _rolling_mean_std(values: np.ndarray, period: int):
+    """Скользящие среднее и выборочное std (ddof=1) по Уэлфорду за один проход"""
+    n = values.shape[0]
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+
+    count = 0
+    window_mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        count, window_mean, m2 = _window_step(values, i, period, count, window_mean, m2)
+
+        if count == period:
+            mean[i] = window_mean
+            std[i] = np.sqrt(max(m2, 0.0) / (period - 1)) if period > 1 else np.nan
+
+    return mean, std
+
+
+@njit(cache=True)
+def _vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Накопительный VWAP за один проход (NaN, пока суммарный объем нулевой)"""
+    n = close.shape[0]
+    vwap = np.full(n, np.nan)
+
+    sum_pv = 0.0
+    sum_v = 0.0
+    for i in range(n):
+        value, sum_pv, sum_v = _vwap_step(high[i], low[i], close[i], volume[i], sum_pv, sum_v)
+        vwap[i] = value
+
+    return vwap
+
+
+@njit(cache=True)
+def _compute_indicators(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                        rsi_period: int, ema_fast_period: int, ema_slow_period: int,
+                        volume_period: int, bb_period: int, bb_std: float):
+    """Все индикаторы process_ohlcv за один проход по колонкам
+
+    Период 0 отключает индикатор (колонка остается NaN). Возвращает
+    (rsi, ema_fast, ema_slow, vwap, volume_sma, bb_upper, bb_middle, bb_lower).
+    """
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    ema_fast = np.full(n, np.nan)
+    ema_slow = np.full(n, np.nan)
+    vwap = np.full(n, np.nan)
+    volume_sma = np.full(n, np.nan)
+    bb_upper = np.full(n, np.nan)
+    bb_middle = np.full(n, np.nan)
+    bb_lower = np.full(n, np.nan)
+
+    alpha_fast = 2.0 / (ema_fast_period + 1)
+    alpha_slow = 2.0 / (ema_slow_period + 1)
+    rsi_count = 0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    fast = np.nan
+    fast_weight = 1.0
+    slow = np.nan
+    slow_weight = 1.0
+    sum_pv = 0.0
+    sum_v = 0.0
+    volume_count = 0
+    volume_mean = 0.0
+    volume_m2 = 0.0
+    bb_count = 0
+    bb_mean = 0.0
+    bb_m2 = 0.0
+
+    for i in range(n):
+        price = close[i]
+
+        # RSI (Уайлдер)
+        if rsi_period > 0 and i > 0:
+            delta = price - close[i - 1]
+            rsi_count, avg_gain, avg_loss = _rsi_step(delta, rsi_period, rsi_count, avg_gain, avg_loss)
+            if np.isfinite(delta) and rsi_count >= rsi_period:
+                rsi[i] = _rsi_value(avg_gain, avg_loss)
+
+        # EMA (adjust=False)
+        if ema_fast_period > 0:
+            fast, fast_weight = _ema_step(price, alpha_fast, fast, fast_weight)
+            ema_fast[i] = fast
+        if ema_slow_period > 0:
+            slow, slow_weight = _ema_step(price, alpha_slow, slow, slow_weight)
+            ema_slow[i] = slow
+
+        # VWAP
+        value, sum_pv, sum_v = _vwap_step(high[i], low[i], price, volume[i], sum_pv, sum_v)
+        vwap[i] = value
+
+        # SMA объема
+        if volume_period > 0:
+            volume_count, volume_mean, volume_m2 = _window_step(
+                volume, i, volume_period, volume_count, volume_mean, volume_m2
+            )
+            if volume_count == volume_period:
+                volume_sma[i] = volume_mean
+
+        # Полосы Боллинджера
+        if bb_period > 0:
+            bb_count, bb_mean, bb_m2 = _window_step(close, i, bb_period, bb_count, bb_mean, bb_m2)
+            if bb_count == bb_period:
+                std = np.sqrt(max(bb_m2, 0.0) / (bb_period - 1)) if bb_period > 1 else np.nan
+                bb_middle[i] = bb_mean
+                bb_upper[i] = bb_mean + std * bb_std
+                bb_lower[i] = bb_mean - std * bb_std
+
+    return rsi, ema_fast, ema_slow, vwap, volume_sma, bb_upper, bb_middle, bb_lower
+
+
+# Векторные версии ядер для установки без numba: некомпилированный цикл по
+# барам медленнее pandas. Пропуски (NaN/inf) обрабатываются так же, как в ядрах.
+
+
+def _finite_series(values: np.ndarray) -> pd.Series:
+    """Колонка как Series, бесконечности приравнены к пропускам"""
+    return pd.Series(np.where(np.isfinite(values), values, np.nan))
+
+
+def _rsi_wilder_vectorized(close: np.ndarray, period: int) -> np.ndarray:
+    """RSI Уайлдера через ewm: простое среднее первых period изменений, далее alpha = 1 / period"""
+    delta = _finite_series(close).diff()
+    valid = delta.dropna()
+    rsi = np.full(close.shape[0], np.nan)
+    if len(valid) < period:
+        return rsi
+
+    def wilder(values: pd.Series) -> np.ndarray:
+        seeded = pd.concat([pd.Series([values.iloc[:period].mean()]), values.iloc[period:]], ignore_index=True)
+        return seeded.ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+    avg_gain = wilder(valid.clip(lower=0))
+    avg_loss = wilder((-valid).clip(lower=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(avg_loss == 0.0, np.where(avg_gain > 0.0, 100.0, 50.0),
+                          100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+
+    rsi[valid.index[period - 1:]] = values
+    return rsi
+
+
+def _rolling_mean_std_vectorized(values: np.ndarray, period: int):
+    """Скользящие среднее и выборочное std через pandas rolling"""
+    window = _finite_series(values).rolling(window=period)
+    return window.mean().to_numpy(), window.std().to_numpy()
+
+
+def _vwap_vectorized(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Накопительный VWAP через cumsum"""
+    volume = _finite_series(volume)
+    pv = _finite_series((high + low + close) / 3.0 * volume.to_numpy())
+    cum_v = volume.cumsum().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(cum_v != 0.0, pv.cumsum().to_numpy() / cum_v, np.nan)
+
+
+def _compute_indicators_vectorized(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                                   rsi_period: int, ema_fast_period: int, ema_slow_period: int,
+                                   volume_period: int, bb_period: int, bb_std: float):
+    """Векторная версия _compute_indicators с тем же результатом"""
+    n = close.shape[0]
+    empty = np.full(n, np.nan)
+    prices = _finite_series(close)
+
+    rsi = _rsi_wilder_vectorized(close, rsi_period) if rsi_period > 0 else empty
+    ema_fast = prices.ewm(span=ema_fast_period, adjust=False).mean().to_numpy() if ema_fast_period > 0 else empty
+    ema_slow = prices.ewm(span=ema_slow_period, adjust=False).mean().to_numpy() if ema_slow_period > 0 else empty
+    vwap = _vwap_vectorized(high, low, close, volume)
+    volume_sma = _rolling_mean_std_vectorized(volume, volume_period)[0] if volume_period > 0 else empty
+
+    if bb_period > 0:
+        bb_middle, std = _rolling_mean_std_vectorized(close, bb_period)
+        bb_upper = bb_middle + std * bb_std
+        bb_lower = bb_middle - std * bb_std
+    else:
+        bb_upper = bb_middle = bb_lower = empty
+
+    return rsi, ema_fast, ema_slow, vwap, volume_sma, bb_upper, bb_middle, bb_lower
+
+
+# Реализации, используемые TechnicalProcessor: ядра numba или векторные pandas
+if NUMBA_AVAILABLE:
+    _rsi_impl, _rolling_mean_std_impl, _vwap_impl, _indicators_impl = (
+        _rsi_wilder, _rolling_mean_std, _vwap, _compute_indicators
+    )
+else:
+    _rsi_impl, _rolling_mean_std_impl, _vwap_impl, _indicators_impl = (
+        _rsi_wilder_vectorized, _rolling_mean_std_vectorized, _vwap_vectorized, _compute_indicators_vectorized
+    )
+
+
+# Колонки, используемые сигналами get_snapshot_signals
+_SIGNAL_COLUMNS = ('close', 'volume', 'rsi', 'ema_fast', 'ema_slow', 'volume_sma', 'bb_upper', 'bb_lower')
+
+
+def _is_missing(value: Any) -> bool:
+    """Отсутствующее значение индикатора: None или NaN (NaN != NaN)"""
+    return value is None or value != value
+
 
 class TechnicalProcessor:
     """Процессор технических индикаторов"""
@@ -12,13 +333,9 @@ class TechnicalProcessor:
         self.indicators = {}
 
     def calculate_rsi(self, data: pd.Series, period: int = 14) -> pd.Series:
-        """Расчет RSI"""
-        delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        """Расчет RSI (сглаживание Уайлдера)"""
+        close = data.to_numpy(dtype=np.float64)
+        return pd.Series(_rsi_impl(close, period), index=data.index)
 
     def calculate_ema(self, data: pd.Series, period: int) -> pd.Series:
         """Расчет EMA"""
@@ -30,54 +347,58 @@ class TechnicalProcessor:
 
     def calculate_vwap(self, df: pd.DataFrame) -> pd.Series:
         """Расчет VWAP"""
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        return (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
+        vwap = _vwap_impl(
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64),
+            df['volume'].to_numpy(dtype=np.float64)
+        )
+        return pd.Series(vwap, index=df.index)
 
     def calculate_bollinger_bands(self, data: pd.Series, period: int = 20, std_dev: int = 2):
         """Расчет полос Боллинджера"""
-        sma = self.calculate_sma(data, period)
-        std = data.rolling(window=period).std()
-
-        upper_band = sma + (std * std_dev)
-        lower_band = sma - (std * std_dev)
+        mean, std = _rolling_mean_std_impl(data.to_numpy(dtype=np.float64), period)
 
         return {
-            'upper': upper_band,
-            'middle': sma,
-            'lower': lower_band
+            'upper': pd.Series(mean + std * std_dev, index=data.index),
+            'middle': pd.Series(mean, index=data.index),
+            'lower': pd.Series(mean - std * std_dev, index=data.index)
         }
 
     def process_ohlcv(self, df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFrame:
-        """Обработка OHLCV данных с добавлением индикаторов"""
+        """Обработка OHLCV данных с добавлением индикаторов (один проход по данным)"""
         result_df = df.copy()
 
-        # RSI
-        if 'rsi' in config:
-            rsi_period = config['rsi'].get('period', 14)
-            result_df['rsi'] = self.calculate_rsi(df['close'], rsi_period)
+        rsi_period = config['rsi'].get('period', 14) if 'rsi' in config else 0
+        fast_period = config['ema_fast'].get('period', 9) if 'ema_fast' in config else 0
+        slow_period = config['ema_slow'].get('period', 21) if 'ema_slow' in config else 0
+        vol_period = config['volume_sma'].get('period', 20) if 'volume_sma' in config else 0
 
-        # EMA быстрая и медленная
-        if 'ema_fast' in config:
-            fast_period = config['ema_fast'].get('period', 9)
-            result_df['ema_fast'] = self.calculate_ema(df['close'], fast_period)
+        rsi, ema_fast, ema_slow, vwap, volume_sma, bb_upper, bb_middle, bb_lower = _indicators_impl(
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64),
+            df['volume'].to_numpy(dtype=np.float64),
+            rsi_period, fast_period, slow_period, vol_period, 20, 2.0
+        )
 
-        if 'ema_slow' in config:
-            slow_period = config['ema_slow'].get('period', 21)
-            result_df['ema_slow'] = self.calculate_ema(df['close'], slow_period)
+        # RSI, EMA быстрая и медленная, объем SMA - только при наличии в конфиге
+        if rsi_period:
+            result_df['rsi'] = rsi
+        if fast_period:
+            result_df['ema_fast'] = ema_fast
+        if slow_period:
+            result_df['ema_slow'] = ema_slow
 
-        # VWAP
-        result_df['vwap'] = self.calculate_vwap(df)
+        result_df['vwap'] = vwap
 
-        # Объем SMA
-        if 'volume_sma' in config:
-            vol_period = config['volume_sma'].get('period', 20)
-            result_df['volume_sma'] = self.calculate_sma(df['volume'], vol_period)
+        if vol_period:
+            result_df['volume_sma'] = volume_sma
 
         # Полосы Боллинджера
-        bb = self.calculate_bollinger_bands(df['close'])
-        result_df['bb_upper'] = bb['upper']
-        result_df['bb_middle'] = bb['middle']
-        result_df['bb_lower'] = bb['lower']
+        result_df['bb_upper'] = bb_upper
+        result_df['bb_middle'] = bb_middle
+        result_df['bb_lower'] = bb_lower
 
         return result_df
 
@@ -86,48 +407,64 @@ class TechnicalProcessor:
         if len(df) < 2:
             return {"error": "Недостаточно данных для анализа"}
 
-        current = df.iloc[-1]
-        previous = df.iloc[-2]
+        # Два последних значения только нужных колонок - без материализации строк
+        current = {}
+        previous = {}
+        for column in _SIGNAL_COLUMNS:
+            if column in df.columns:
+                values = df[column].to_numpy()
+                current[column] = float(values[-1])
+                previous[column] = float(values[-2])
+
+        return self.get_snapshot_signals(current, previous, timestamp=df.index[-1])
+
+    def get_snapshot_signals(self, current: Mapping, previous: Optional[Mapping] = None,
+                             timestamp: Any = None) -> Dict[str, Any]:
+        """Сигналы по срезу индикаторов (строка DataFrame или dict)
 
+        Без предыдущего среза кроссовер EMA не проверяется.
+        """
         signals = {
-            "timestamp": current.name,
+            "timestamp": timestamp,
             "price": current['close'],
             "signals": []
         }
 
         # RSI сигналы
-        if 'rsi' in current and not pd.isna(current['rsi']):
-            if current['rsi'] > 70:
+        rsi = current.get('rsi')
+        if not _is_missing(rsi):
+            if rsi > 70:
                 signals["signals"].append(
-                    {"type": "RSI", "signal": "SELL", "value": current['rsi'], "reason": "Перекупленность"})
-            elif current['rsi'] < 30:
+                    {"type": "RSI", "signal": "SELL", "value": rsi, "reason": "Перекупленность"})
+            elif rsi < 30:
                 signals["signals"].append(
-                    {"type": "RSI", "signal": "BUY", "value": current['rsi'], "reason": "Перепроданность"})
+                    {"type": "RSI", "signal": "BUY", "value": rsi, "reason": "Перепроданность"})
 
         # EMA кроссовер
-        if all(x in current for x in ['ema_fast', 'ema_slow']) and not any(
-                pd.isna(current[x]) for x in ['ema_fast', 'ema_slow']):
-            if all(x in previous for x in ['ema_fast', 'ema_slow']) and not any(
-                    pd.isna(previous[x]) for x in ['ema_fast', 'ema_slow']):
-                if current['ema_fast'] > current['ema_slow'] and previous['ema_fast'] <= previous['ema_slow']:
+        if previous is not None:
+            fast, slow = current.get('ema_fast'), current.get('ema_slow')
+            prev_fast, prev_slow = previous.get('ema_fast'), previous.get('ema_slow')
+            if not (_is_missing(fast) or _is_missing(slow) or _is_missing(prev_fast) or _is_missing(prev_slow)):
+                if fast > slow and prev_fast <= prev_slow:
                     signals["signals"].append({"type": "EMA_CROSS", "signal": "BUY", "reason": "Бычий кроссовер EMA"})
-                elif current['ema_fast'] < current['ema_slow'] and previous['ema_fast'] >= previous['ema_slow']:
+                elif fast < slow and prev_fast >= prev_slow:
                     signals["signals"].append(
                         {"type": "EMA_CROSS", "signal": "SELL", "reason": "Медвежий кроссовер EMA"})
 
         # Объемный анализ
-        if 'volume_sma' in current and not pd.isna(current['volume_sma']):
-            volume_ratio = current['volume'] / current['volume_sma']
+        volume_sma = current.get('volume_sma')
+        if not _is_missing(volume_sma):
+            volume_ratio = current['volume'] / volume_sma
             if volume_ratio > 1.5:
                 signals["signals"].append(
                     {"type": "VOLUME", "signal": "ATTENTION", "value": volume_ratio, "reason": "Повышенный объем"})
 
         # Анализ Боллинджера
-        if all(x in current for x in ['bb_upper', 'bb_lower']) and not any(
-                pd.isna(current[x]) for x in ['bb_upper', 'bb_lower']):
-            if current['close'] > current['bb_upper']:
+        bb_upper, bb_lower = current.get('bb_upper'), current.get('bb_lower')
+        if not (_is_missing(bb_upper) or _is_missing(bb_lower)):
+            if current['close'] > bb_upper:
                 signals["signals"].append({"type": "BOLLINGER", "signal": "SELL", "reason": "Цена выше верхней полосы"})
-            elif current['close'] < current['bb_lower']:
+            elif current['close'] < bb_lower:
                 signals["signals"].append({"type": "BOLLINGER", "signal": "BUY", "reason": "Цена ниже нижней полосы"})
 
         return signals
\ No newline at end of file
@@ -9,9 +9,18 @@ from dataclasses import dataclass
 from datetime import datetime
 import ccxt
 from loguru import logger
+import asyncio
 import inspect
 
 
+# Статусы ccxt -> статусы системы (OrderStatus)
+_CCXT_ORDER_STATUSES = {
+    'open': 'placed',
+    'closed': 'filled',
+    'canceled': 'cancelled',
+}
+
+
 @dataclass
 class Order:
     """Ордер на бирже"""
@@ -86,6 +95,55 @@ class BaseExchange(ABC):
         """Получение информации об ордере"""
         pass
 
+    async def amend_order(self, order: Order, price: Optional[Decimal],
+                          quantity: Decimal) -> Optional[Order]:
+        """Изменение цены/объема ордера на бирже без отмены
+
+        Возвращает обновленный ордер или None, если биржа не поддерживает изменение.
+        """
+        if not self.exchange or not self.exchange.has.get('editOrder'):
+            return None
+
+        try:
+            args = (order.id, order.symbol, order.type, order.side,
+                    float(quantity), float(price) if price is not None else None)
+
+            if inspect.iscoroutinefunction(self.exchange.edit_order):
+                raw_order = await self.exchange.edit_order(*args)
+            else:
+                raw_order = self.exchange.edit_order(*args)
+
+            return self._normalize_order(raw_order)
+
+        except Exception as e:
+            logger.error(f"Ошибка изменения ордера {order.id}: {e}")
+            raise
+
+    async def get_open_orders(self, symbols: Optional[List[str]] = None) -> List[Order]:
+        """Получение открытых ордеров одним запросом на символ
+
+        Без symbols запрашиваются открытые ордера по всем символам (если биржа
+        это поддерживает).
+        """
+        try:
+            fetch = self.exchange.fetch_open_orders
+            is_coro = inspect.iscoroutinefunction(fetch)
+
+            async def fetch_symbol(symbol: Optional[str]) -> List[Dict]:
+                if is_coro:
+                    return await fetch(symbol)
+                return fetch(symbol)
+
+            batches = await asyncio.gather(*(
+                fetch_symbol(symbol) for symbol in (symbols or [None])
+            ))
+
+            return [self._normalize_order(raw) for batch in batches for raw in batch]
+
+        except Exception as e:
+            logger.error(f"Ошибка получения открытых ордеров: {e}")
+            raise
+
     async def get_ticker(self, symbol: str) -> Dict:
         """Получение текущей цены"""
         try:
@@ -136,6 +194,16 @@ class BaseExchange(ABC):
             return True  # Если рынки не загружены, пропускаем проверку
         return symbol in self._markets
 
+    @staticmethod
+    def _normalize_status(raw_order: Dict) -> str:
+        """Статус ордера ccxt в терминах системы (нет статуса - ордер только создан)"""
+        status = raw_order.get('status')
+        if status is None:
+            return 'pending'
+        if status == 'open' and raw_order.get('filled'):
+            return 'partially_filled'
+        return _CCXT_ORDER_STATUSES.get(status, status)
+
     def _normalize_order(self, raw_order: Dict) -> Order:
         """Нормализация ордера из формата биржи"""
         return Order(
@@ -145,8 +213,8 @@ class BaseExchange(ABC):
             side=raw_order['side'],
             price=Decimal(str(raw_order.get('price', 0))) if raw_order.get('price') else None,
             quantity=Decimal(str(raw_order['amount'])),
-            status=raw_order['status'],
-            filled_quantity=Decimal(str(raw_order.get('filled', 0))),
+            status=self._normalize_status(raw_order),
+            filled_quantity=Decimal(str(raw_order.get('filled') or 0)),
             timestamp=datetime.fromtimestamp(raw_order['timestamp'] / 1000) if raw_order.get(
                 'timestamp') else datetime.utcnow()
         )
\ No newline at end of file
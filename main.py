@@ -13,6 +13,7 @@ from loguru import logger
 from config.settings import Settings
 from config.trading_config import TradingConfig
 from utils.logger import setup_logger
+from utils.event_loop import install_uvloop
 
 
 async def run_real_trading():
@@ -645,6 +646,7 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -8,6 +8,8 @@ from datetime import datetime
 from decimal import Decimal
 from enum import Enum
 
+from utils.sizing import signal_priority
+
 
 class SignalType(str, Enum):
     BUY = "BUY"
@@ -186,7 +188,7 @@ def create_signal_from_analysis(
         priority=_calculate_priority(analysis),
         strategy=strategy,
         risk_score=analysis.risk_score or 0.5,
-        position_size_usd=Decimal(str(quantity)) * (analysis.entry_price or Decimal("0")),
+        position_size_usd=quantity * (analysis.entry_price or Decimal("0")),
         reasoning=analysis.reasoning,
         metadata={
             "ai_confidence": analysis.confidence,
@@ -199,16 +201,10 @@ def create_signal_from_analysis(
 
 def _calculate_priority(analysis: AIAnalysisResult) -> int:
     """Расчет приоритета сигнала"""
-    base_priority = 5
-
-    # Корректировка на уверенность
-    confidence_bonus = int((analysis.adjusted_confidence or analysis.confidence) * 3)
-
-    # Корректировка на риск
-    risk_penalty = int((analysis.risk_score or 0.5) * 2)
-
-    priority = base_priority + confidence_bonus - risk_penalty
-    return max(1, min(10, priority))
+    return signal_priority(
+        float(analysis.adjusted_confidence or analysis.confidence),
+        float(analysis.risk_score or 0.5)
+    )
 
 
 # Валидация данных перед отправкой в Event Bus
@@ -9,6 +9,7 @@ from loguru import logger
 import aiohttp
 from config.settings import settings
 from core.event_bus import EventBus, Event, EventType
+from utils.helpers import format_duration_ms
 
 
 class TelegramBot:
@@ -302,7 +303,7 @@ ETH: 2.5
 
 Символ: <b>{data['symbol']}</b>
 PnL: <code>${pnl:+.2f} ({pnl_percent:+.2f}%)</code>
-Длительность: {data['duration']}
+Длительность: {format_duration_ms(data['duration_ms'])}
 """
         await self._broadcast(message)
 
@@ -2,7 +2,7 @@
 """
 Мониторы для отслеживания рисков в реальном времени
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, date
 from decimal import Decimal
 from loguru import logger
@@ -177,7 +177,8 @@ class RiskMonitor:
 class PositionMonitor:
     """Монитор для отслеживания отдельных позиций"""
 
-    def __init__(self):
+    def __init__(self, portfolio: Optional[Portfolio] = None):
+        self.portfolio = portfolio
         self.position_alerts = {}
         self.position_history = {}
 
@@ -187,8 +188,11 @@ class PositionMonitor:
         position_id = position.id
 
         try:
-            # Обновляем PnL
-            position.update_pnl(current_price)
+            # Обновляем PnL (через портфель - для учета в его статистике)
+            if self.portfolio:
+                self.portfolio.update_position_pnl(position, current_price)
+            else:
+                position.update_pnl(current_price)
 
             # Проверка больших потерь
             if position.pnl_percent < -5:  # Более 5% потерь
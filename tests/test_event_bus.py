@@ -0,0 +1,200 @@
+# tests/test_event_bus.py
+"""
+Тесты шины событий
+"""
+import asyncio
+import functools
+import pytest
+from datetime import datetime
+from core.event_bus import EventBus, Event, EventType
+
+
+class TestEventBus:
+    """Тесты шины событий"""
+
+    @pytest.fixture
+    async def event_bus(self):
+        bus = EventBus()
+        await bus.start()
+        yield bus
+        await bus.stop()
+
+    @pytest.mark.asyncio
+    async def test_sync_and_async_handlers_called(self, event_bus):
+        """Тест вызова синхронных и асинхронных обработчиков"""
+        received = []
+        done = asyncio.Event()
+
+        def on_sync(event):
+            received.append(('sync', event.data['n']))
+
+        async def on_async(event):
+            received.append(('async', event.data['n']))
+            done.set()
+
+        event_bus.subscribe(EventType.PRICE_UPDATE, on_sync)
+        event_bus.subscribe(EventType.PRICE_UPDATE, on_async)
+        await event_bus.publish(Event(type=EventType.PRICE_UPDATE, data={'n': 1}))
+        await asyncio.wait_for(done.wait(), timeout=2)
+
+        assert sorted(received) == [('async', 1), ('sync', 1)]
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_only_given_handler(self, event_bus):
+        """Тест отписки одного обработчика"""
+        received = []
+        done = asyncio.Event()
+
+        async def on_first(event):
+            received.append('first')
+
+        async def on_second(event):
+            received.append('second')
+            done.set()
+
+        event_bus.subscribe(EventType.PRICE_UPDATE, on_first)
+        event_bus.subscribe(EventType.PRICE_UPDATE, on_second)
+        event_bus.unsubscribe(EventType.PRICE_UPDATE, on_first)
+        event_bus.unsubscribe(EventType.ORDER_FILLED, on_first)
+
+        event_bus.publish_nowait(Event(type=EventType.PRICE_UPDATE, data={}))
+        await asyncio.wait_for(done.wait(), timeout=2)
+
+        assert received == ['second']
+        assert not event_bus.has_subscribers(EventType.ORDER_FILLED)
+
+    @pytest.mark.asyncio
+    async def test_stop_delivers_pending_events(self):
+        """Тест доставки уже опубликованных событий при остановке"""
+        bus = EventBus()
+        received = []
+        bus.subscribe(EventType.PRICE_UPDATE, lambda event: received.append(event.data['n']))
+        await bus.start()
+
+        for n in range(3):
+            bus.publish_nowait(Event(type=EventType.PRICE_UPDATE, data={'n': n}))
+        await asyncio.wait_for(bus.stop(), timeout=1)
+
+        assert received == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_batched_events_keep_order_per_handler(self, event_bus):
+        """Тест порядка доставки событий из одной пачки каждому обработчику"""
+        prices, fills = [], []
+        done = asyncio.Event()
+
+        async def on_price(event):
+            await asyncio.sleep(0)
+            prices.append(event.data['n'])
+
+        async def on_any(event):
+            fills.append((event.type, event.data['n']))
+            if len(fills) == 4:
+                done.set()
+
+        event_bus.subscribe(EventType.PRICE_UPDATE, on_price)
+        event_bus.subscribe(EventType.PRICE_UPDATE, on_any)
+        event_bus.subscribe(EventType.ORDER_FILLED, on_any)
+
+        for n, event_type in enumerate([EventType.PRICE_UPDATE, EventType.ORDER_FILLED,
+                                        EventType.PRICE_UPDATE, EventType.ORDER_FILLED]):
+            event_bus.publish_nowait(Event(type=event_type, data={'n': n}))
+        await asyncio.wait_for(done.wait(), timeout=2)
+        await asyncio.sleep(0.01)
+
+        assert prices == [0, 2]
+        assert [n for _, n in fills] == [0, 1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_failing_partial_handler_does_not_stop_worker(self, event_bus):
+        """Тест ошибки в обработчике-partial: воркер продолжает доставку"""
+        done = asyncio.Event()
+
+        def failing(tag, event):
+            raise RuntimeError(tag)
+
+        event_bus.subscribe(EventType.PRICE_UPDATE, functools.partial(failing, "boom"))
+        event_bus.subscribe(EventType.ORDER_FILLED, lambda event: done.set())
+
+        event_bus.publish_nowait(Event(type=EventType.PRICE_UPDATE, data={}))
+        event_bus.publish_nowait(Event(type=EventType.ORDER_FILLED, data={}))
+        await asyncio.wait_for(done.wait(), timeout=2)
+
+    @pytest.mark.asyncio
+    async def test_unhashable_handler_receives_batch(self, event_bus):
+        """Тест доставки пачки нехешируемому обработчику и остальным подписчикам"""
+
+        class Recorder:
+            # __eq__ без __hash__ делает объект нехешируемым
+            def __init__(self):
+                self.received = []
+
+            def __eq__(self, other):
+                return self is other
+
+            def __call__(self, event):
+                self.received.append(event.data['n'])
+
+        recorder = Recorder()
+        others = []
+        done = asyncio.Event()
+
+        def on_other(event):
+            others.append(event.data['n'])
+            if len(others) == 2:
+                done.set()
+
+        event_bus.subscribe(EventType.PRICE_UPDATE, recorder)
+        event_bus.subscribe(EventType.PRICE_UPDATE, on_other)
+
+        event_bus.publish_nowait(Event(type=EventType.PRICE_UPDATE, data={'n': 0}))
+        event_bus.publish_nowait(Event(type=EventType.PRICE_UPDATE, data={'n': 1}))
+        await asyncio.wait_for(done.wait(), timeout=2)
+
+        assert recorder.received == [0, 1]
+        assert others == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_bound_method_keeps_order_across_event_types(self, event_bus):
+        """Тест порядка для bound method, подписанного на несколько типов событий"""
+
+        class Listener:
+            def __init__(self):
+                self.received = []
+                self.done = asyncio.Event()
+
+            async def on_event(self, event):
+                # Медленные PRICE_UPDATE обогнали бы быстрые ORDER_FILLED при параллельной доставке
+                if event.type == EventType.PRICE_UPDATE:
+                    await asyncio.sleep(0.01)
+                self.received.append(event.data['n'])
+                if len(self.received) == 4:
+                    self.done.set()
+
+        listener = Listener()
+        event_bus.subscribe(EventType.PRICE_UPDATE, listener.on_event)
+        event_bus.subscribe(EventType.ORDER_FILLED, listener.on_event)
+
+        for n, event_type in enumerate([EventType.PRICE_UPDATE, EventType.ORDER_FILLED,
+                                        EventType.PRICE_UPDATE, EventType.ORDER_FILLED]):
+            event_bus.publish_nowait(Event(type=event_type, data={'n': n}))
+        await asyncio.wait_for(listener.done.wait(), timeout=2)
+
+        assert listener.received == [0, 1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_publish_without_subscribers_skips_queue(self, event_bus):
+        """Тест пропуска события без подписчиков"""
+        await event_bus.publish(Event(type=EventType.ORDER_BOOK_UPDATE, data={}))
+        event_bus.publish_nowait(Event(type=EventType.PRICE_UPDATE, data={}))
+
+        assert event_bus._event_queue.empty()
+
+    def test_event_timestamp_is_unix_time(self):
+        """Тест метки времени события: float, datetime только по запросу"""
+        before = datetime.utcnow().replace(microsecond=0)
+        event = Event(type=EventType.PRICE_UPDATE, data={})
+
+        assert isinstance(event.timestamp, float)
+        assert event.created_at >= before
+        assert not hasattr(event, '__dict__')
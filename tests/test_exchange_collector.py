@@ -0,0 +1,186 @@
+# tests/test_exchange_collector.py
+"""
+Тесты сборщика данных с бирж
+"""
+import asyncio
+import time
+import pytest
+from collections import deque
+from data.collectors import exchange_collector
+from data.collectors.exchange_collector import ExchangeDataCollector
+
+
+class FakeExchange:
+    """Биржа-заглушка: свечи с задержкой и учетом параллельных запросов"""
+
+    def __init__(self):
+        self.markets = {'BTC/USDT': {}}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch_ohlcv(self, symbol, timeframe, limit=100):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if symbol == "BAD":
+            raise ConnectionError("timeout")
+        return [[1700000000000 + i * 300000, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10.0] for i in range(limit)]
+
+
+class StreamingExchange(FakeExchange):
+    """Биржа-заглушка с websocket потоком свечей из очереди"""
+
+    def __init__(self):
+        super().__init__()
+        self.pushes = asyncio.Queue()
+        self.rest_calls = 0
+
+    async def fetch_ohlcv(self, symbol, timeframe, limit=100):
+        self.rest_calls += 1
+        return await super().fetch_ohlcv(symbol, timeframe, limit)
+
+    async def watch_ohlcv(self, symbol, timeframe):
+        return await self.pushes.get()
+
+    async def close(self):
+        pass
+
+
+class MarketsExchange(FakeExchange):
+    """Биржа-заглушка с подсчетом загрузок рынков"""
+
+    def __init__(self):
+        super().__init__()
+        self.markets = {}
+        self.load_calls = 0
+
+    async def load_markets(self, reload=False):
+        self.load_calls += 1
+        self.markets = {'BTC/USDT': {'id': 'BTCUSDT', 'symbol': 'BTC/USDT'}}
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+
+
+class TestExchangeDataCollector:
+    """Тесты сборщика данных"""
+
+    @pytest.fixture
+    def collector(self):
+        collector = ExchangeDataCollector("binance")
+        collector.exchange = FakeExchange()
+        return collector
+
+    @pytest.mark.asyncio
+    async def test_get_ohlcv_many_bounded_concurrency(self, collector):
+        """Тест параллельной загрузки свечей с ограничением одновременных запросов"""
+        symbols = [f"SYM{i}" for i in range(6)] + ["BAD"]
+
+        frames = await collector.get_ohlcv_many(symbols, limit=5, max_concurrency=3)
+
+        assert list(frames) == symbols
+        assert collector.exchange.max_in_flight == 3
+        assert all(len(frames[symbol]) == 5 for symbol in symbols[:-1])
+        assert frames["BAD"].empty
+
+    @pytest.mark.asyncio
+    async def test_stream_updates_ring_buffer(self, collector):
+        """Тест websocket потока: прогрев REST, обновление и добавление свечей"""
+        exchange = StreamingExchange()
+        collector.exchange = exchange
+        collector.start_ohlcv_stream("BTC/USDT", "5m", limit=3)
+
+        async def warmed_up():
+            while ("BTC/USDT", "5m") not in collector._buffers:
+                await asyncio.sleep(0.005)
+
+        await asyncio.wait_for(warmed_up(), timeout=1)
+
+        last_ts = 1700000000000 + 2 * 300000
+        await exchange.pushes.put([[last_ts, 102.0, 110.0, 101.0, 109.0, 20.0],
+                                   [last_ts + 300000, 109.0, 111.0, 108.0, 110.0, 5.0]])
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        df = await collector.get_ohlcv("BTC/USDT", "5m", limit=3)
+        await collector.close()
+
+        assert exchange.rest_calls == 1
+        assert df['close'].tolist() == [101.5, 109.0, 110.0]
+        assert not collector._streams
+
+    @pytest.mark.asyncio
+    async def test_collectors_share_http_session(self):
+        """Тест общей HTTP сессии для сборщиков одной биржи"""
+        first = ExchangeDataCollector("binance")
+        second = ExchangeDataCollector("binance")
+        session = first.exchange.session
+
+        assert session is not None
+        assert second.exchange.session is session
+        assert ExchangeDataCollector._session_refs["binance"] == 2
+
+        await first.close()
+        assert not session.closed
+
+        await second.close()
+        assert session.closed
+        assert "binance" not in ExchangeDataCollector._sessions
+
+    @pytest.mark.asyncio
+    async def test_markets_loaded_from_disk_cache(self, collector, tmp_path, monkeypatch):
+        """Тест повторного использования рынков из суточного кэша на диске"""
+        monkeypatch.setattr(exchange_collector, 'MARKETS_CACHE_DIR', tmp_path)
+        first = MarketsExchange()
+        collector.exchange = first
+        await collector._ensure_markets()
+
+        second = MarketsExchange()
+        collector.exchange = second
+        await collector._ensure_markets()
+
+        assert first.load_calls == 1
+        assert second.load_calls == 0
+        assert second.markets == {'BTC/USDT': {'id': 'BTCUSDT', 'symbol': 'BTC/USDT'}}
+        assert len(list(tmp_path.glob("binance_testnet_*.json"))) == 1
+
+    @pytest.mark.asyncio
+    async def test_connection_bypasses_disk_cache(self, collector, tmp_path, monkeypatch):
+        """Тест: проверка подключения всегда обращается к бирже и чистит старый кэш"""
+        monkeypatch.setattr(exchange_collector, 'MARKETS_CACHE_DIR', tmp_path)
+        stale = tmp_path / "binance_testnet_20000101.json"
+        stale.write_text("{}")
+        other = tmp_path / "bybit_testnet_20000101.json"
+        other.write_text("{}")
+
+        collector.exchange = MarketsExchange()
+        await collector._ensure_markets()
+
+        exchange = MarketsExchange()
+        collector.exchange = exchange
+        assert await collector.test_connection()
+
+        assert exchange.load_calls == 1
+        assert not stale.exists()
+        assert other.exists()
+        assert len(list(tmp_path.glob("binance_testnet_*.json"))) == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_stream_falls_back_to_rest(self, collector):
+        """Тест перехода на REST, если поток не обновлялся дольше таймфрейма"""
+        exchange = StreamingExchange()
+        collector.exchange = exchange
+        key = ("BTC/USDT", "5m")
+        collector._buffers[key] = deque([[1700000000000 + i * 300000, 1.0, 1.0, 1.0, 1.0, 1.0] for i in range(3)], maxlen=3)
+
+        collector._last_push[key] = time.monotonic()
+        fresh = await collector.get_ohlcv("BTC/USDT", "5m", limit=3)
+        assert exchange.rest_calls == 0
+        assert fresh['close'].tolist() == [1.0, 1.0, 1.0]
+
+        collector._last_push[key] = time.monotonic() - 301
+        stale = await collector.get_ohlcv("BTC/USDT", "5m", limit=3)
+        assert exchange.rest_calls == 1
+        assert stale['close'].tolist() == [100.5, 101.5, 102.5]
@@ -0,0 +1,217 @@
+# tests/test_order_manager.py
+"""
+Тесты менеджера ордеров
+"""
+import asyncio
+import dataclasses
+import itertools
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from core.event_bus import EventBus
+from core.order_manager import OrderManager
+from exchange.base_exchange import BaseExchange, Order
+
+
+class InMemoryExchange:
+    """Биржа в памяти: ордера размещаются сразу со статусом pending"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.orders = {}
+
+    async def place_order(self, symbol, side, order_type, quantity, price=None):
+        order = Order(
+            id=f"order_{next(self._ids)}", symbol=symbol, type=order_type,
+            side=side, price=price, quantity=quantity, status='pending'
+        )
+        self.orders[order.id] = order
+        return order
+
+    async def cancel_order(self, order_id, symbol):
+        return order_id in self.orders
+
+    async def get_order(self, order_id, symbol):
+        return self.orders.get(order_id)
+
+
+class AmendingExchange(InMemoryExchange):
+    """Биржа в памяти с изменением ордеров на месте"""
+
+    async def amend_order(self, order, price, quantity):
+        amended = dataclasses.replace(order, price=price, quantity=quantity)
+        self.orders[order.id] = amended
+        return amended
+
+
+class BatchingExchange(InMemoryExchange):
+    """Биржа в памяти с пакетным запросом открытых ордеров"""
+
+    def __init__(self):
+        super().__init__()
+        self.get_order_calls = 0
+
+    async def get_open_orders(self, symbols=None):
+        return [o for o in self.orders.values() if o.status == 'pending' and o.symbol in symbols]
+
+    async def get_order(self, order_id, symbol):
+        self.get_order_calls += 1
+        return await super().get_order(order_id, symbol)
+
+
+class TestOrderManager:
+    """Тесты менеджера ордеров"""
+
+    @pytest.fixture
+    def manager(self):
+        return OrderManager(InMemoryExchange(), EventBus())
+
+    @pytest.mark.asyncio
+    async def test_brackets_created_on_fill(self, manager):
+        """Тест создания SL/TP сразу после исполнения основного ордера"""
+        entry = await manager.place_order(
+            "BTCUSDT", "buy", "limit", Decimal("0.01"), Decimal("45000"),
+            stop_loss=Decimal("44000"), take_profit=Decimal("47000")
+        )
+        await asyncio.sleep(0)
+        assert len(manager.orders) == 1
+
+        entry.order.status = 'filled'
+        await manager._handle_status_change(entry, 'pending')
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        brackets = {o.metadata['type']: o for o in manager.orders.values() if o.parent_order_id}
+        assert brackets.keys() == {'stop_loss', 'take_profit'}
+        assert brackets['stop_loss'].order.side == 'sell'
+        assert brackets['take_profit'].order.price == Decimal("47000")
+
+    @pytest.mark.asyncio
+    async def test_brackets_skipped_on_cancel(self, manager):
+        """Тест отсутствия SL/TP для отмененного ордера"""
+        entry = await manager.place_order(
+            "BTCUSDT", "buy", "limit", Decimal("0.01"), Decimal("45000"),
+            stop_loss=Decimal("44000")
+        )
+        await asyncio.sleep(0)
+
+        assert await manager.cancel_order(entry.order.id)
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        assert len(manager.orders) == 1
+        assert entry._settled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_pushed_update_fills_order(self, manager):
+        """Тест обработки push обновления статуса ордера"""
+        manager.poll_interval = None
+        await manager.start()
+        try:
+            entry = await manager.place_order("BTCUSDT", "buy", "market", Decimal("0.01"), Decimal("45000"))
+
+            manager.on_order_update(dataclasses.replace(entry.order, status='filled'))
+            await asyncio.wait_for(entry._settled.wait(), timeout=1)
+
+            assert entry.order.id not in manager.active_orders
+        finally:
+            await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_expired_order_cancelled_by_timer(self, manager):
+        """Тест отмены ордера по истечении времени через кучу сроков"""
+        manager.poll_interval = None
+        await manager.start()
+        try:
+            entry = await manager.place_order("BTCUSDT", "buy", "limit", Decimal("0.01"), Decimal("45000"))
+            entry.expire_time = datetime.utcnow() + timedelta(milliseconds=20)
+            manager._schedule_expiry(entry)
+
+            await asyncio.wait_for(entry._settled.wait(), timeout=1)
+
+            assert entry.order.status == 'cancelled'
+            assert not manager._expiry_heap
+        finally:
+            await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_final_status_removes_active_order(self, manager):
+        """Тест снятия ордера с активных при любом финальном статусе"""
+        entry = await manager.place_order("BTCUSDT", "buy", "limit", Decimal("0.01"), Decimal("45000"))
+        assert entry.is_active
+
+        entry.order.status = 'partially_filled'
+        await manager._handle_status_change(entry, 'pending')
+        assert entry.order.id in manager.active_orders
+
+        entry.order.status = 'expired'
+        await manager._handle_status_change(entry, 'partially_filled')
+        assert not entry.is_active
+        assert entry.order.id not in manager.active_orders
+        assert entry._settled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_update_order_amends_in_place(self):
+        """Тест изменения ордера без отмены и пересоздания"""
+        manager = OrderManager(AmendingExchange(), EventBus())
+        entry = await manager.place_order("BTCUSDT", "buy", "limit", Decimal("0.01"), Decimal("45000"))
+
+        assert await manager.update_order(entry.order.id, new_price=Decimal("44900"))
+
+        assert list(manager.active_orders) == [entry.order.id]
+        assert entry.order.price == Decimal("44900")
+        assert entry.order.quantity == Decimal("0.01")
+
+    @pytest.mark.asyncio
+    async def test_update_order_recreates_without_amend(self, manager):
+        """Тест пересоздания ордера, если биржа не поддерживает изменение"""
+        entry = await manager.place_order("BTCUSDT", "buy", "limit", Decimal("0.01"), Decimal("45000"))
+
+        assert await manager.update_order(entry.order.id, new_price=Decimal("44900"))
+
+        assert entry.order.status == 'cancelled'
+        [replacement] = manager.active_orders.values()
+        assert replacement.order.price == Decimal("44900")
+
+    @pytest.mark.asyncio
+    async def test_poll_uses_open_orders_batch(self):
+        """Тест опроса статусов одним запросом открытых ордеров"""
+        exchange = BatchingExchange()
+        manager = OrderManager(exchange, EventBus())
+        filled = await manager.place_order("BTCUSDT", "buy", "limit", Decimal("0.01"), Decimal("45000"))
+        await manager.place_order("ETHUSDT", "buy", "limit", Decimal("0.1"), Decimal("3000"))
+        exchange.orders[filled.order.id] = dataclasses.replace(filled.order, status='filled')
+
+        updates = await manager._fetch_order_updates(tuple(manager.active_orders.values()))
+
+        # Только исполненный ордер пропал из открытых и запрошен отдельно
+        assert exchange.get_order_calls == 1
+        assert {o.id: o.status for o in updates} == {
+            filled.order.id: 'filled', 'order_2': 'pending'
+        }
+
+    @pytest.mark.asyncio
+    async def test_unknown_status_keeps_order_active(self, manager):
+        """Тест: неизвестный или открытый статус ccxt не завершает ордер"""
+        entry = await manager.place_order("BTCUSDT", "buy", "limit", Decimal("0.01"), Decimal("45000"))
+
+        entry.order.status = 'open'
+        await manager._handle_status_change(entry, 'pending')
+        assert entry.is_active
+        assert entry.order.id in manager.active_orders
+        assert not entry._settled.is_set()
+
+        entry.order.status = 'canceled'
+        await manager._handle_status_change(entry, 'open')
+        assert not entry.is_active
+        assert entry._settled.is_set()
+
+    def test_normalize_maps_ccxt_statuses(self):
+        """Тест приведения статусов ccxt к статусам системы"""
+        statuses = {None: 'pending', 'open': 'placed', 'closed': 'filled', 'canceled': 'cancelled',
+                    'expired': 'expired', 'rejected': 'rejected'}
+
+        for ccxt_status, expected in statuses.items():
+            assert BaseExchange._normalize_status({'status': ccxt_status, 'filled': 0}) == expected
+
+        assert BaseExchange._normalize_status({'status': 'open', 'filled': 0.005}) == 'partially_filled'
@@ -0,0 +1,100 @@
+# tests/test_portfolio.py
+"""
+Тесты портфеля
+"""
+import copy
+import pickle
+import pytest
+from decimal import Decimal
+from core.portfolio import Portfolio, Position
+
+
+class TestPortfolio:
+    """Тесты портфеля"""
+
+    @pytest.fixture
+    def portfolio(self):
+        return Portfolio(Decimal("10000"))
+
+    @staticmethod
+    def _position(position_id: str, symbol: str, side: str = 'long') -> Position:
+        return Position(
+            id=position_id,
+            symbol=symbol,
+            side=side,
+            entry_price=Decimal("100"),
+            quantity=Decimal("2")
+        )
+
+    @pytest.mark.asyncio
+    async def test_stats_snapshot_reused_until_change(self, portfolio):
+        """Тест повторного использования снимка статистики до изменения портфеля"""
+        first = await portfolio.get_portfolio_stats()
+        snapshot = portfolio._stats_snapshot
+        assert await portfolio.get_portfolio_stats() == first
+        assert portfolio._stats_snapshot is snapshot
+
+        await portfolio.open_position(self._position("pos_1", "BTCUSDT"))
+        stats = await portfolio.get_portfolio_stats()
+
+        assert portfolio._stats_snapshot is not snapshot
+        assert stats['positions_count'] == 1
+        assert stats['locked_balance'] == Decimal("200")
+
+    @pytest.mark.asyncio
+    async def test_stats_snapshot_protected_from_callers(self, portfolio):
+        """Тест: изменение полученной статистики не портит общий снимок"""
+        stats = await portfolio.get_portfolio_stats()
+        assert pickle.loads(pickle.dumps(stats)) == copy.deepcopy(stats) == stats
+
+        stats['total_value'] = Decimal("0")
+        stats['assets']['USDT']['free'] = Decimal("0")
+        stats['assets']['BTC'] = {}
+
+        again = await portfolio.get_portfolio_stats()
+        assert again['total_value'] == Decimal("10000")
+        assert again['assets'] == {'USDT': {'free': Decimal("10000"), 'locked': Decimal("0"), 'total': Decimal("10000")}}
+
+    @pytest.mark.asyncio
+    async def test_unrealized_pnl_tracked_incrementally(self, portfolio):
+        """Тест инкрементального учета нереализованного PnL"""
+        long = self._position("pos_1", "BTCUSDT")
+        short = self._position("pos_2", "ETHUSDT", side='short')
+        await portfolio.open_position(long)
+        await portfolio.open_position(short)
+
+        portfolio.update_position_pnl(long, Decimal("110"))
+        portfolio.update_position_pnl(short, Decimal("95"))
+        stats = await portfolio.get_portfolio_stats()
+        assert stats['unrealized_pnl'] == Decimal("30")
+
+        await portfolio.close_position("pos_1", Decimal("120"))
+        stats = await portfolio.get_portfolio_stats()
+        assert stats['unrealized_pnl'] == Decimal("10")
+        assert stats['total_value'] == Decimal("10040")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_stats_after_direct_balance_change(self, portfolio):
+        """Тест сброса снимка после прямого изменения баланса"""
+        await portfolio.get_portfolio_stats()
+
+        portfolio.assets['USDT'].free += Decimal("500")
+        portfolio.assets['USDT'].total += Decimal("500")
+        portfolio.invalidate_stats()
+
+        stats = await portfolio.get_portfolio_stats()
+        assert stats['total_value'] == Decimal("10500")
+
+    @pytest.mark.asyncio
+    async def test_reduce_quantity_refreshes_cost_basis(self, portfolio):
+        """Тест пересчета стоимости входа после частичного закрытия"""
+        position = self._position("pos_1", "BTCUSDT")
+        assert position.cost_basis == Decimal("200")
+
+        position.reduce_quantity(Decimal("0.5"))
+        position.update_pnl(Decimal("110"))
+
+        assert position.cost_basis == Decimal("150")
+        assert position.quantity_float == 1.5
+        assert position.pnl == Decimal("15")
+        assert position.pnl_percent == Decimal("10")
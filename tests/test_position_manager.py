@@ -0,0 +1,119 @@
+# tests/test_position_manager.py
+"""
+Тесты менеджера позиций
+"""
+import asyncio
+import pytest
+from decimal import Decimal
+from core.portfolio import Portfolio
+from core.event_bus import EventBus, Event, EventType
+from core.engine.position_manager import PositionManager
+
+
+class TestPositionManager:
+    """Тесты менеджера позиций"""
+
+    @pytest.fixture
+    def portfolio(self):
+        return Portfolio(Decimal("10000"))
+
+    @pytest.fixture
+    async def position_manager(self, portfolio):
+        manager = PositionManager(portfolio, EventBus())
+        await manager.initialize()
+        yield manager
+        await manager.stop()
+
+    @staticmethod
+    def _fill(symbol: str, side: str, price: float, quantity: float = 0.01) -> Event:
+        return Event(
+            type=EventType.ORDER_FILLED,
+            data={
+                'symbol': symbol,
+                'side': side,
+                'price': price,
+                'quantity': quantity,
+                'strategy': 'test'
+            }
+        )
+
+    @pytest.mark.asyncio
+    async def test_fill_batch_opens_and_closes(self, position_manager, portfolio):
+        """Тест пакетной обработки: открытие и закрытие в одном пакете"""
+        await position_manager._on_order_filled(self._fill("BTCUSDT", "buy", 45000))
+        await position_manager._on_order_filled(self._fill("ETHUSDT", "buy", 3000))
+        await position_manager._on_order_filled(self._fill("BTCUSDT", "sell", 46000))
+        await position_manager._fill_queue.join()
+
+        symbols = [pos.symbol for pos in portfolio.positions.values()]
+        assert symbols == ["ETHUSDT"]
+        assert position_manager.position_trackers.keys() == portfolio.positions.keys()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_pending_fills(self, portfolio):
+        """Тест обработки оставшихся в буфере ордеров при остановке"""
+        manager = PositionManager(portfolio, EventBus())
+        await manager._on_order_filled(self._fill("BTCUSDT", "buy", 45000))
+
+        await manager.stop()
+
+        # Позиция была открыта из буфера и закрыта при остановке с прибылью
+        assert len(portfolio.positions) == 0
+        assert portfolio.assets['USDT'].free > Decimal("10000")
+        assert manager._fill_queue.empty()
+
+    @pytest.mark.asyncio
+    async def test_stop_keeps_fills_collected_in_batch(self, portfolio):
+        """Тест остановки во время добора пакета: собранные ордера не теряются"""
+        manager = PositionManager(portfolio, EventBus())
+        await manager.initialize()
+        opened = []
+        manager.add_position_listener(on_opened=opened.append)
+
+        await manager._on_order_filled(self._fill("BTCUSDT", "buy", 45000))
+        await asyncio.sleep(0.001)
+        assert manager._fill_queue.qsize() == 0
+
+        await manager.stop()
+
+        assert [data['symbol'] for data in opened] == ["BTCUSDT"]
+        assert manager._fill_consumer_task is None
+        assert manager._fill_queue.empty()
+
+    @pytest.mark.asyncio
+    async def test_strategy_statistics_follow_open_and_close(self, position_manager):
+        """Тест статистики по стратегиям при открытии и закрытии"""
+        await position_manager._on_order_filled(self._fill("BTCUSDT", "buy", 45000, 0.02))
+        await position_manager._on_order_filled(self._fill("ETHUSDT", "buy", 3000, 0.5))
+        await position_manager._fill_queue.join()
+
+        stats = await position_manager.get_position_statistics()
+        assert stats['open_positions'] == 2
+        assert stats['strategy_breakdown']['test']['count'] == 2
+        assert stats['strategy_breakdown']['test']['total_value'] == pytest.approx(2400.0)
+
+        await position_manager._on_order_filled(self._fill("BTCUSDT", "sell", 46000, 0.02))
+        await position_manager._fill_queue.join()
+
+        stats = await position_manager.get_position_statistics()
+        assert stats['strategy_breakdown']['test']['count'] == 1
+        assert stats['strategy_breakdown']['test']['total_value'] == pytest.approx(1500.0)
+
+    @pytest.mark.asyncio
+    async def test_emergency_status_tracks_symbol_index(self, position_manager):
+        """Тест индекса символ -> позиция в статусе экстренных операций"""
+        await position_manager._on_order_filled(self._fill("BTCUSDT", "buy", 45000))
+        await position_manager._fill_queue.join()
+
+        opened = await position_manager.get_emergency_status()
+        position = position_manager.portfolio.get_position_by_symbol("BTCUSDT")
+        assert opened['positions_by_symbol'] == {"BTCUSDT": position.id}
+
+        await position_manager._on_order_filled(self._fill("BTCUSDT", "sell", 46000))
+        await position_manager._fill_queue.join()
+
+        status = await position_manager.get_emergency_status()
+        assert status['open_positions_count'] == 0
+        assert status['positions_by_symbol'] == {}
+        # Снимок не меняется вслед за портфелем
+        assert opened['positions_by_symbol'] == {"BTCUSDT": position.id}
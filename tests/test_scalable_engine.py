@@ -0,0 +1,264 @@
+# tests/test_scalable_engine.py
+"""
+Тесты масштабируемого мульти-аккаунт движка
+"""
+import asyncio
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from config.trading_config import TradingConfig
+from core.scalable_engine import MultiAccountEngine
+from utils.helpers import create_sample_data
+
+
+class TestMultiAccountEngine:
+    """Тесты мульти-аккаунт движка"""
+
+    @pytest.fixture
+    async def engine(self, test_settings):
+        engine = MultiAccountEngine(test_settings, TradingConfig())
+        for name in ("Alice", "Bob", "Carol"):
+            await engine.add_client_account({'name': name, 'deposit': 1000})
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_active_accounts_trade_concurrently(self, engine, monkeypatch):
+        """Тест параллельной торговли активных аккаунтов"""
+        engine.accounts["client_003"].active = False
+        started = []
+        both_started = asyncio.Event()
+
+        async def no_analysis(now):
+            return {}
+
+        async def trade(account_id, market_analysis):
+            started.append(account_id)
+            if len(started) == 2:
+                both_started.set()
+            # Последовательный цикл здесь бы завис
+            await asyncio.wait_for(both_started.wait(), timeout=1)
+
+        monkeypatch.setattr(engine, "_perform_market_analysis", no_analysis)
+        monkeypatch.setattr(engine, "_trade_for_account", trade)
+
+        await engine._trading_cycle()
+
+        assert sorted(started) == ["client_001", "client_002"]
+        assert engine.performance_tracker.daily_stats
+
+    @pytest.mark.asyncio
+    async def test_market_analysis_runs_pairs_concurrently(self, engine):
+        """Тест параллельного анализа торговых пар с изоляцией ошибок"""
+        symbols = [pair.symbol for pair in engine.trading_config.trading_pairs if pair.enabled]
+        in_flight = set()
+        all_started = asyncio.Event()
+        analyzed = []
+
+        class Exchange:
+            async def get_market_data(self, symbol, timeframe, limit):
+                in_flight.add(symbol)
+                if len(in_flight) == len(symbols):
+                    all_started.set()
+                await asyncio.wait_for(all_started.wait(), timeout=1)
+                if symbol == symbols[-1]:
+                    raise ConnectionError("timeout")
+                return create_sample_data(symbol, periods=20)
+
+        class Analyzer:
+            async def analyze_symbol(self, symbol):
+                analyzed.append(symbol)
+
+        engine.exchange_manager = Exchange()
+        engine.market_analyzer = Analyzer()
+
+        states = await engine._perform_market_analysis()
+
+        assert list(states) == symbols[:-1]
+        assert sorted(analyzed) == sorted(symbols[:-1])
+        assert states[symbols[0]].current_price > 0
+
+    @pytest.mark.asyncio
+    async def test_market_state_from_price_arrays(self, engine):
+        """Тест расчета цены, объема и изменения цены по массивам"""
+        data = create_sample_data("BTCUSDT", periods=20)
+
+        class Exchange:
+            async def get_market_data(self, symbol, timeframe, limit):
+                return data
+
+        class Analyzer:
+            async def analyze_symbol(self, symbol):
+                pass
+
+        engine.exchange_manager = Exchange()
+        engine.market_analyzer = Analyzer()
+
+        now = datetime.utcnow()
+        state = await engine._analyze_pair("BTCUSDT", now)
+
+        assert state.timestamp == now
+        close = data['close']
+        assert state.current_price == Decimal(repr(float(close.iloc[-1])))
+        assert float(state.volume_24h) == pytest.approx(data['volume'].sum())
+        assert state.price_change_24h == pytest.approx((close.iloc[-1] / close.iloc[0] - 1) * 100)
+
+    @pytest.mark.asyncio
+    async def test_performance_stats_sum_active_accounts(self, engine):
+        """Тест сводной статистики только по активным аккаунтам"""
+        engine.accounts["client_002"].active = False
+
+        await engine.performance_tracker.update_stats(engine.accounts, engine.account_portfolios)
+        summary = engine.performance_tracker.get_performance_summary()
+
+        assert summary['total_accounts'] == 2
+        assert summary['total_aum'] == pytest.approx(2000.0)
+        assert summary['total_profit'] == 0.0
+
+    def test_strategy_config_independent_per_strategy(self, engine):
+        """Тест конфигурации риск-профиля: у каждой стратегии своя копия"""
+        aggressive = engine._get_strategy_config("AI_Driven", "aggressive")
+        aggressive.update({'max_positions': 1})
+        aggressive['rsi']['period'] = 7
+
+        other = engine._get_strategy_config("SimpleMomentum", "aggressive")
+        assert other['max_positions'] == 8
+        assert other['rsi']['period'] == 14
+        assert other.keys() >= engine.trading_config.technical_indicators.keys()
+        assert engine._get_strategy_config("AI_Driven", "unknown")['position_size_percent'] == 2.0
+
+    @pytest.mark.asyncio
+    async def test_cached_analysis_fetched_once_per_symbol(self, engine, monkeypatch):
+        """Тест получения кэшированного анализа один раз на символ за цикл"""
+        lookups = []
+        received = {}
+
+        class Analyzer:
+            def get_cached_analysis(self, symbol):
+                lookups.append(symbol)
+                return {'ai_analysis': {'action': 'HOLD'}} if symbol == "BTCUSDT" else None
+
+        async def analysis(now):
+            return {"BTCUSDT": None, "ETHUSDT": None}
+
+        async def trade(account_id, cached_analyses):
+            received[account_id] = cached_analyses
+
+        engine.market_analyzer = Analyzer()
+        monkeypatch.setattr(engine, "_perform_market_analysis", analysis)
+        monkeypatch.setattr(engine, "_trade_for_account", trade)
+
+        await engine._trading_cycle()
+
+        assert lookups == ["BTCUSDT", "ETHUSDT"]
+        assert len(received) == 3
+        assert all(list(cached) == ["BTCUSDT"] for cached in received.values())
+
+    @pytest.mark.asyncio
+    async def test_account_performance_and_limits_on_floats(self, engine):
+        """Тест производительности и лимитов аккаунта на float копиях сумм"""
+        account = engine.accounts["client_001"]
+        assert not hasattr(account, '__dict__')
+        assert account.initial_deposit_f == 1000.0
+        assert account.fee_rate_f == pytest.approx(0.2)
+
+        performance = await engine.get_account_performance("client_001")
+        assert performance['initial_deposit'] == 1000.0
+        assert performance['pnl_percent'] == 0.0
+
+        assert await engine._check_account_limits(account, {'total_value': Decimal("900")})
+        assert not await engine._check_account_limits(account, {'total_value': Decimal("790")})
+
+    @pytest.mark.asyncio
+    async def test_performance_history_bounded(self, engine, monkeypatch):
+        """Тест ограниченной истории дневной статистики и последней сводки"""
+        monkeypatch.setattr("core.scalable_engine.PERFORMANCE_HISTORY_DAYS", 2)
+        tracker = engine.performance_tracker
+
+        for day in (1, 2, 3):
+            await tracker.update_stats(engine.accounts, engine.account_portfolios, datetime(2024, 1, day))
+
+        assert [d.day for d in tracker.daily_stats] == [2, 3]
+        assert tracker.get_performance_summary()['last_updated'] == datetime(2024, 1, 3).isoformat()
+
+    @pytest.mark.asyncio
+    async def test_all_accounts_performance_keeps_order(self, engine):
+        """Тест производительности всех аккаунтов в порядке их добавления"""
+        performances = await engine.get_all_accounts_performance()
+
+        assert [p['account_id'] for p in performances] == list(engine.accounts)
+
+    @pytest.mark.asyncio
+    async def test_notifications_flushed_once_per_cycle(self, engine, monkeypatch):
+        """Тест отправки уведомлений аккаунтов пачкой в конце цикла"""
+        delivered = []
+
+        async def analysis(now):
+            return {}
+
+        async def trade(account_id, cached_analyses):
+            engine._send_account_notification(engine.accounts[account_id], "Открыта позиция", "position_opened")
+            assert not delivered
+
+        async def deliver(account, message, notification_type, created_at):
+            delivered.append(account.id)
+
+        monkeypatch.setattr(engine, "_perform_market_analysis", analysis)
+        monkeypatch.setattr(engine, "_trade_for_account", trade)
+        monkeypatch.setattr(engine, "_deliver_account_notification", deliver)
+
+        await engine._trading_cycle()
+
+        assert sorted(delivered) == list(engine.accounts)
+        assert engine._pending_notifications == []
+
+    @pytest.mark.asyncio
+    async def test_client_account_amounts_parsed_once(self, engine):
+        """Тест приведения сумм аккаунта к Decimal без промежуточной строки"""
+        account_id = await engine.add_client_account({'name': "Dave", 'deposit': 2500.5, 'fee_rate': "0.15"})
+        account = engine.accounts[account_id]
+
+        assert account.initial_deposit == account.current_balance == Decimal("2500.5")
+        assert account.fee_rate == Decimal("0.15")
+
+    @pytest.mark.asyncio
+    async def test_toggle_account_strategy_rebuilds_active_list(self, engine, monkeypatch):
+        """Тест списка активных стратегий аккаунта при переключении"""
+        executed = []
+
+        async def execute(account_id, strategy, cached_analyses):
+            executed.append(strategy.name)
+
+        monkeypatch.setattr(engine, "_execute_strategy_for_account", execute)
+        [strategy] = engine.account_strategies["client_001"]
+
+        assert engine.toggle_account_strategy("client_001", strategy.name, False)
+        await engine._trade_for_account("client_001", {})
+        assert executed == []
+
+        assert engine.toggle_account_strategy("client_001", strategy.name, True)
+        await engine._trade_for_account("client_001", {})
+        assert executed == [strategy.name]
+
+        assert not engine.toggle_account_strategy("client_001", "Unknown", True)
+
+    @pytest.mark.asyncio
+    async def test_market_analysis_limited_to_needed_symbols(self, engine, monkeypatch):
+        """Тест анализа только пар, нужных активным стратегиям"""
+        analyzed = []
+
+        async def analyze_pair(symbol, now):
+            analyzed.append(symbol)
+
+        monkeypatch.setattr(engine, "_analyze_pair", analyze_pair)
+
+        for account_id, strategies in engine.account_strategies.items():
+            for strategy in strategies:
+                engine.toggle_account_strategy(account_id, strategy.name, False)
+        await engine._perform_market_analysis()
+        assert analyzed == []
+
+        [strategy] = engine.account_strategies["client_002"]
+        strategy.symbols = ["ETHUSDT"]
+        engine.toggle_account_strategy("client_002", strategy.name, True)
+        await engine._perform_market_analysis()
+        assert analyzed == ["ETHUSDT"]
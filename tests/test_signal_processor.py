@@ -0,0 +1,186 @@
+# tests/test_signal_processor.py
+"""
+Тесты процессора сигналов
+"""
+import pytest
+from decimal import Decimal
+from core.portfolio import Portfolio
+from core.event_bus import EventBus, EventType
+from core.engine.signal_processor import SignalProcessor
+from risk.risk_manager import RiskManager
+from config.trading_config import RiskConfig
+from models.trading_signals import TradingSignal, SignalType, AIAnalysisResult
+
+
+class TestSignalProcessor:
+    """Тесты процессора сигналов"""
+
+    @pytest.fixture
+    def processor(self):
+        portfolio = Portfolio(Decimal("10000"))
+        return SignalProcessor(EventBus(), RiskManager(RiskConfig(), portfolio))
+
+    @staticmethod
+    def _signal(symbol: str, action: SignalType, confidence: float) -> TradingSignal:
+        return TradingSignal(
+            symbol=symbol,
+            action=action,
+            quantity=Decimal("0.01"),
+            confidence=confidence,
+            priority=5,
+            strategy="test",
+            risk_score=0.5,
+            position_size_usd=Decimal("450"),
+            reasoning="test"
+        )
+
+    @pytest.mark.asyncio
+    async def test_signal_statistics(self, processor):
+        """Тест статистики сигналов"""
+        await processor._generate_trading_signal_safe(self._signal("BTCUSDT", SignalType.BUY, 0.8))
+        await processor._generate_trading_signal_safe(self._signal("BTCUSDT", SignalType.SELL, 0.6))
+        await processor._generate_trading_signal_safe(self._signal("ETHUSDT", SignalType.BUY, 0.7))
+
+        stats = await processor.get_signal_statistics()
+
+        assert stats['total_signals'] == 3
+        assert stats['avg_confidence'] == pytest.approx(0.7)
+        assert stats['most_active_symbol'] == "BTCUSDT"
+        assert stats['signal_distribution'] == {'BUY': 2, 'SELL': 1, 'HOLD': 0}
+        assert stats['symbols_traded'] == ["BTCUSDT", "ETHUSDT"]
+
+    @pytest.mark.asyncio
+    async def test_signal_statistics_after_history_eviction(self, processor):
+        """Тест агрегатов после вытеснения старых сигналов из истории"""
+        for _ in range(600):
+            await processor._generate_trading_signal_safe(self._signal("BTCUSDT", SignalType.BUY, 0.9))
+        for _ in range(500):
+            await processor._generate_trading_signal_safe(self._signal("ETHUSDT", SignalType.SELL, 0.7))
+
+        stats = await processor.get_signal_statistics()
+        history = [record.signal for record in processor.signal_history]
+
+        assert stats['total_signals'] == len(history) == 1000
+        assert stats['avg_confidence'] == pytest.approx(sum(s.confidence for s in history) / len(history))
+        assert stats['signal_distribution']['BUY'] == sum(1 for s in history if s.action == SignalType.BUY)
+        assert set(stats['symbols_traded']) == {s.symbol for s in history}
+
+    @staticmethod
+    def _analysis(confidence: float, **kwargs) -> AIAnalysisResult:
+        return AIAnalysisResult(
+            symbol="BTCUSDT",
+            action=SignalType.BUY,
+            confidence=confidence,
+            reasoning="test",
+            entry_price=Decimal("40000"),
+            **kwargs
+        )
+
+    @pytest.mark.asyncio
+    async def test_position_size_capped_by_risk_limit(self, processor):
+        """Тест размера позиции: сильное преимущество при низкой волатильности упирается в лимит"""
+        processor.risk_manager.config.sigma_forecast = 0.01
+        size = await processor._calculate_position_size_safe(self._analysis(0.8), 0.8)
+
+        # 10000 * 2% (max_position_size_percent) / 40000
+        assert size == Decimal("0.005")
+        assert await processor._validate_risk_safe(
+            self._signal("BTCUSDT", SignalType.BUY, 0.8).model_copy(
+                update={'quantity': size, 'position_size_usd': size * 40000}
+            )
+        )
+
+    @pytest.mark.asyncio
+    async def test_position_size_scales_with_confidence(self, processor):
+        """Тест размера позиции: растет с уверенностью в рабочем диапазоне 0.6-0.9, ниже лимита"""
+        for take_profit, stop_loss in ((Decimal("41600"), Decimal("39200")),
+                                       (Decimal("40800"), Decimal("39200")),
+                                       (Decimal("40400"), Decimal("39600"))):
+            sizes = [
+                await processor._calculate_position_size_safe(
+                    self._analysis(confidence, take_profit=take_profit, stop_loss=stop_loss), confidence
+                )
+                for confidence in (0.6, 0.7, 0.8, 0.9)
+            ]
+
+            assert Decimal("0") < sizes[0] < sizes[1] < sizes[2] < sizes[3] < Decimal("0.005")
+
+    @pytest.mark.asyncio
+    async def test_position_size_reduced_by_risk_score(self, processor):
+        """Тест размера позиции: высокий риск сигнала уменьшает долю"""
+        safe = await processor._calculate_position_size_safe(self._analysis(0.8, risk_score=0.1), 0.8)
+        risky = await processor._calculate_position_size_safe(self._analysis(0.8, risk_score=0.7), 0.8)
+
+        assert Decimal("0") < risky < safe
+
+    @pytest.mark.asyncio
+    async def test_position_size_zero_without_edge(self, processor):
+        """Тест нулевого размера, если преимущество не покрывает издержки"""
+        analysis = self._analysis(0.5, take_profit=Decimal("40400"), stop_loss=Decimal("39600"))
+
+        assert await processor._calculate_position_size_safe(analysis, 0.5) == Decimal("0")
+
+    @pytest.mark.asyncio
+    async def test_generated_signal_enqueued_on_event_bus(self, processor):
+        """Тест публикации сигнала в очередь шины событий"""
+        processor.event_bus.subscribe(EventType.SIGNAL_GENERATED, lambda event: None)
+        await processor._generate_trading_signal_safe(self._signal("BTCUSDT", SignalType.BUY, 0.8))
+
+        event = processor.event_bus._event_queue.get_nowait()
+        assert event.type == EventType.SIGNAL_GENERATED
+        assert event.data['symbol'] == "BTCUSDT"
+        assert event.source == "SignalProcessor"
+
+    @pytest.mark.asyncio
+    async def test_validation_cached_for_identical_analysis(self, processor):
+        """Тест повторного использования валидации одинаковых данных анализа"""
+        def data(symbol: str) -> dict:
+            return {
+                'symbol': symbol,
+                'analysis': {'symbol': symbol, 'action': 'BUY', 'confidence': 0.8, 'reasoning': 'test'},
+                'technical_data': {'close': 45000.0}
+            }
+
+        first = await processor._validate_cached(data("BTCUSDT"))
+        assert await processor._validate_cached(data("BTCUSDT")) is first
+        assert await processor._validate_cached(data("ETHUSDT")) is not first
+
+        for i in range(200):
+            await processor._validate_cached(data(f"SYM{i}"))
+        assert len(processor._validation_cache) == 128
+
+    @pytest.mark.asyncio
+    async def test_validation_works_after_restart(self, processor):
+        """Тест валидации после stop() и повторной инициализации"""
+        data = {
+            'symbol': 'BTCUSDT',
+            'analysis': {'symbol': 'BTCUSDT', 'action': 'BUY', 'confidence': 0.8, 'reasoning': 'test'}
+        }
+        await processor.initialize()
+        await processor._validate_cached(data)
+        await processor.stop()
+
+        await processor.initialize()
+        validated = await processor._validate_cached(data)
+        await processor.stop()
+
+        assert validated.symbol == 'BTCUSDT'
+
+    @pytest.mark.asyncio
+    async def test_high_risk_score_rejected_before_sizing(self, processor):
+        """Тест отклонения по риск-скору без обращения к портфелю"""
+        async def get_portfolio_stats():
+            raise AssertionError("portfolio should not be queried")
+
+        processor.risk_manager.portfolio.get_portfolio_stats = get_portfolio_stats
+
+        assert await processor._evaluate_signal_safe("BTCUSDT", self._analysis(0.8, risk_score=0.9)) is None
+
+    @pytest.mark.asyncio
+    async def test_evaluate_returns_risk_checked_signal(self, processor):
+        """Тест оценки сигнала: размер рассчитан и проверен риск-менеджером"""
+        signal = await processor._evaluate_signal_safe("BTCUSDT", self._analysis(0.8, risk_score=0.4))
+
+        # 2% * Келли 0.675 (TP 4% / SL 2%, издержки 0.1%) * риск (1 - 0.5 * 0.4)
+        assert signal.quantity == Decimal("0.0027")
+        assert signal.position_size_usd == Decimal("108")
@@ -79,4 +79,19 @@ class TestSimpleMomentumStrategy:
 
         score = strategy._calculate_momentum_score(processed_data)
         assert -100 <= score <= 100
-        assert isinstance(score, float)
\ No newline at end of file
+        assert isinstance(score, float)
+
+    @pytest.mark.asyncio
+    async def test_analyze_row_uses_precomputed_indicators(self, strategy, uptrend_data):
+        """Тест анализа по срезу совпадает с оценкой по полному DataFrame"""
+        processed_data = strategy.processor.process_ohlcv(
+            uptrend_data,
+            strategy.config['indicators']
+        )
+        row = processed_data.tail(1).to_dict('records')[0]
+
+        analysis = await strategy.analyze_row(row, "BTCUSDT")
+
+        assert analysis['momentum_score'] == strategy._calculate_momentum_score(processed_data)
+        assert analysis['recommendation'] in ('BUY', 'SELL', 'HOLD')
+        assert 'error' not in analysis['technical_signals']
@@ -0,0 +1,181 @@
+# tests/test_technical_processor.py
+"""
+Тесты процессора технических индикаторов
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from data.processors import technical_processor
+from data.processors.technical_processor import TechnicalProcessor
+from utils.helpers import create_sample_data
+
+
+class TestTechnicalProcessor:
+    """Тесты расчета индикаторов"""
+
+    @pytest.fixture
+    def processor(self):
+        return TechnicalProcessor()
+
+    @pytest.fixture
+    def close(self):
+        return create_sample_data("BTCUSDT", periods=200)['close']
+
+    def test_rsi_matches_wilder_reference(self, processor, close):
+        """Тест RSI против эталонного расчета Уайлдера"""
+        period = 14
+        delta = close.diff().to_numpy()
+        gains = np.clip(delta, 0, None)
+        losses = np.clip(-delta, 0, None)
+
+        avg_gain = gains[1:period + 1].mean()
+        avg_loss = losses[1:period + 1].mean()
+        expected = [100 - 100 / (1 + avg_gain / avg_loss)]
+        for i in range(period + 1, len(close)):
+            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+            expected.append(100 - 100 / (1 + avg_gain / avg_loss))
+
+        rsi = processor.calculate_rsi(close, period)
+
+        assert rsi.index.equals(close.index)
+        assert rsi.iloc[:period].isna().all()
+        np.testing.assert_allclose(rsi.iloc[period:].to_numpy(), expected, rtol=1e-9)
+
+    def test_rsi_without_losses(self, processor):
+        """Тест RSI на монотонном росте и на плоской цене"""
+        assert processor.calculate_rsi(pd.Series(np.arange(30.0)), 14).iloc[-1] == 100.0
+        assert processor.calculate_rsi(pd.Series(np.full(30, 5.0)), 14).iloc[-1] == 50.0
+
+    def test_bollinger_matches_rolling_std(self, processor, close):
+        """Тест полос Боллинджера против pandas rolling"""
+        bands = processor.calculate_bollinger_bands(close, period=20, std_dev=2)
+
+        sma = close.rolling(window=20).mean()
+        std = close.rolling(window=20).std()
+
+        pd.testing.assert_series_equal(bands['middle'], sma, check_names=False, rtol=1e-9)
+        pd.testing.assert_series_equal(bands['upper'], sma + 2 * std, check_names=False, rtol=1e-9)
+        pd.testing.assert_series_equal(bands['lower'], sma - 2 * std, check_names=False, rtol=1e-9)
+
+    def test_process_ohlcv_matches_separate_indicators(self, processor):
+        """Тест совпадения однопроходного расчета с отдельными индикаторами"""
+        df = create_sample_data("BTCUSDT", periods=200)
+        config = {
+            'rsi': {'period': 14},
+            'ema_fast': {'period': 9},
+            'ema_slow': {'period': 21},
+            'volume_sma': {'period': 20}
+        }
+
+        result = processor.process_ohlcv(df, config)
+
+        close = df['close']
+        typical = (df['high'] + df['low'] + close) / 3
+        bands = processor.calculate_bollinger_bands(close)
+        expected = {
+            'rsi': processor.calculate_rsi(close, 14),
+            'ema_fast': close.ewm(span=9, adjust=False).mean(),
+            'ema_slow': close.ewm(span=21, adjust=False).mean(),
+            'vwap': (typical * df['volume']).cumsum() / df['volume'].cumsum(),
+            'volume_sma': df['volume'].rolling(window=20).mean(),
+            'bb_upper': bands['upper'],
+            'bb_middle': bands['middle'],
+            'bb_lower': bands['lower']
+        }
+        for column, series in expected.items():
+            pd.testing.assert_series_equal(result[column], series, check_names=False, rtol=1e-9)
+
+    def test_process_ohlcv_skips_unconfigured_indicators(self, processor):
+        """Тест отсутствия колонок для индикаторов не из конфига"""
+        result = processor.process_ohlcv(create_sample_data("BTCUSDT", periods=50), {})
+
+        assert not {'rsi', 'ema_fast', 'ema_slow', 'volume_sma'} & set(result.columns)
+        assert {'vwap', 'bb_upper', 'bb_middle', 'bb_lower'} <= set(result.columns)
+
+    def test_market_signals_match_row_snapshot(self, processor):
+        """Тест сигналов по массивам колонок против сигналов по строкам DataFrame"""
+        df = pd.DataFrame({
+            'close': [100.0, 101.0],
+            'volume': [1000.0, 3000.0],
+            'rsi': [50.0, 75.0],
+            'ema_fast': [99.0, 101.0],
+            'ema_slow': [100.0, 100.5],
+            'volume_sma': [1000.0, 1500.0],
+            'bb_upper': [102.0, 100.5],
+            'bb_lower': [98.0, np.nan]
+        }, index=pd.date_range("2024-01-01", periods=2, freq="5min"))
+
+        signals = processor.get_market_signals(df)
+        expected = processor.get_snapshot_signals(df.iloc[-1], df.iloc[-2], timestamp=df.index[-1])
+
+        assert signals == expected
+        assert signals['timestamp'] == df.index[-1]
+        assert [s['type'] for s in signals['signals']] == ["RSI", "EMA_CROSS", "VOLUME"]
+
+    def test_vwap_matches_cumsum_reference(self, processor):
+        """Тест однопроходного VWAP против расчета через cumsum"""
+        df = create_sample_data("BTCUSDT", periods=200)
+        df.iloc[:3, df.columns.get_loc('volume')] = 0.0
+
+        typical = (df['high'] + df['low'] + df['close']) / 3
+        expected = (typical * df['volume']).cumsum() / df['volume'].cumsum()
+
+        vwap = processor.calculate_vwap(df)
+
+        assert vwap.index.equals(df.index)
+        assert vwap.iloc[:3].isna().all()
+        np.testing.assert_allclose(vwap.to_numpy()[3:], expected.to_numpy()[3:], rtol=1e-10)
+
+    def test_nan_inputs_match_pandas_reference(self, processor):
+        """Тест: пропуск в данных не портит индикаторы после выхода из окна (как в pandas)"""
+        df = create_sample_data("BTCUSDT", periods=300)
+        df.iloc[150, df.columns.get_loc('close')] = np.nan
+        df.iloc[200, df.columns.get_loc('volume')] = np.nan
+        config = {'ema_fast': {'period': 9}, 'ema_slow': {'period': 21}, 'volume_sma': {'period': 20}}
+
+        result = processor.process_ohlcv(df, config)
+
+        close = df['close']
+        typical = (df['high'] + df['low'] + close) / 3
+        sma = close.rolling(window=20).mean()
+        std = close.rolling(window=20).std()
+        expected = {
+            'ema_fast': close.ewm(span=9, adjust=False).mean(),
+            'ema_slow': close.ewm(span=21, adjust=False).mean(),
+            'vwap': (typical * df['volume']).cumsum() / df['volume'].cumsum(),
+            'volume_sma': df['volume'].rolling(window=20).mean(),
+            'bb_middle': sma,
+            'bb_upper': sma + 2 * std
+        }
+        for column, series in expected.items():
+            assert np.isfinite(result[column].iloc[-1])
+            pd.testing.assert_series_equal(result[column], series, check_names=False, rtol=1e-9)
+
+        bands = processor.calculate_bollinger_bands(close)
+        pd.testing.assert_series_equal(bands['middle'], sma, check_names=False, rtol=1e-9)
+        pd.testing.assert_series_equal(processor.calculate_vwap(df), expected['vwap'], check_names=False, rtol=1e-9)
+
+        rsi = processor.calculate_rsi(close, 14)
+        assert rsi.iloc[150:152].isna().all()
+        assert np.isfinite(rsi.iloc[-1])
+
+    def test_vectorized_fallback_matches_kernels(self):
+        """Тест совпадения векторных версий (без numba) с ядрами, в том числе на пропусках"""
+        df = create_sample_data("BTCUSDT", periods=300)
+        df.iloc[150, df.columns.get_loc('close')] = np.nan
+        df.iloc[200, df.columns.get_loc('volume')] = np.inf
+        columns = [df[c].to_numpy(dtype=np.float64) for c in ('high', 'low', 'close', 'volume')]
+
+        kernels = technical_processor._compute_indicators(*columns, 14, 9, 21, 20, 20, 2.0)
+        vectorized = technical_processor._compute_indicators_vectorized(*columns, 14, 9, 21, 20, 20, 2.0)
+
+        for expected, actual in zip(kernels, vectorized):
+            np.testing.assert_allclose(actual, expected, rtol=1e-9, equal_nan=True)
+
+        close = columns[2]
+        np.testing.assert_allclose(technical_processor._rsi_wilder_vectorized(close, 14),
+                                   technical_processor._rsi_wilder(close, 14), rtol=1e-9, equal_nan=True)
+        for flat in (np.arange(30.0), np.full(30, 5.0)):
+            np.testing.assert_array_equal(technical_processor._rsi_wilder_vectorized(flat, 14),
+                                          technical_processor._rsi_wilder(flat, 14))
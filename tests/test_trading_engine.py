@@ -0,0 +1,44 @@
+# tests/test_trading_engine.py
+"""
+Тесты основного торгового движка
+"""
+import asyncio
+import pytest
+from config.trading_config import TradingConfig
+from core.engine import trading_engine as engine_module
+from core.engine.trading_engine import TradingEngine
+
+
+class TestTradingEngine:
+    """Тесты торгового цикла"""
+
+    @pytest.mark.asyncio
+    async def test_restart_does_not_run_extra_cycle(self, test_settings, monkeypatch):
+        """Тест: после stop() повторный start() не запускает внеочередной цикл"""
+        monkeypatch.setattr(engine_module, 'TRADING_CYCLE_INTERVAL', 0.2)
+        engine = TradingEngine(test_settings, TradingConfig())
+        cycles = []
+
+        async def noop():
+            pass
+
+        async def trading_cycle():
+            cycles.append(asyncio.get_running_loop().time())
+
+        monkeypatch.setattr(engine, 'initialize', noop)
+        monkeypatch.setattr(engine, '_trading_cycle', trading_cycle)
+
+        async def stop_after_first_cycle():
+            while not cycles:
+                await asyncio.sleep(0.01)
+            await engine.stop()
+
+        await asyncio.gather(engine.start(), stop_after_first_cycle())
+        cycles.clear()
+
+        task = asyncio.create_task(engine.start())
+        await asyncio.sleep(0.1)
+        assert len(cycles) == 1
+
+        await engine.stop()
+        await task
@@ -19,6 +19,14 @@ class BaseStrategy(ABC):
         """Анализ рынка и генерация сигналов"""
         pass
 
+    async def analyze_row(self, row: Dict[str, Any], symbol: str) -> Dict[str, Any]:
+        """Анализ по одному срезу технических данных
+
+        По умолчанию срез оборачивается в DataFrame; стратегии, умеющие
+        работать со срезом напрямую, переопределяют метод.
+        """
+        return await self.analyze(pd.DataFrame([row]), symbol)
+
     @abstractmethod
     async def should_enter(self, analysis: Dict[str, Any]) -> bool:
         """Проверка условий входа в позицию"""
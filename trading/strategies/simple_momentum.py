@@ -24,14 +24,26 @@ class SimpleMomentumStrategy(BaseStrategy):
         # Анализ моментума
         momentum_score = self._calculate_momentum_score(processed_data)
 
+        analysis = self._build_analysis(symbol, momentum_score, signals)
+        analysis["processed_data"] = processed_data.tail(5)  # Последние 5 записей для анализа
+        return analysis
+
+    async def analyze_row(self, row: Dict[str, Any], symbol: str) -> Dict[str, Any]:
+        """Анализ по срезу с уже рассчитанными индикаторами - без DataFrame"""
+        signals = self.processor.get_snapshot_signals(row, timestamp=row.get('timestamp'))
+        momentum_score = self._score_snapshot(row)
+
+        return self._build_analysis(symbol, momentum_score, signals)
+
+    def _build_analysis(self, symbol: str, momentum_score: float, signals: Dict[str, Any]) -> Dict[str, Any]:
+        """Формирование результата анализа"""
         return {
             "symbol": symbol,
             "strategy": self.name,
             "momentum_score": momentum_score,
             "technical_signals": signals,
             "recommendation": self._get_recommendation(momentum_score, signals),
-            "confidence": abs(momentum_score) / 100,  # Нормализованная уверенность
-            "processed_data": processed_data.tail(5)  # Последние 5 записей для анализа
+            "confidence": abs(momentum_score) / 100  # Нормализованная уверенность
         }
 
     def _calculate_momentum_score(self, df: pd.DataFrame) -> float:
@@ -39,7 +51,10 @@ class SimpleMomentumStrategy(BaseStrategy):
         if len(df) < 10:
             return 0.0
 
-        current = df.iloc[-1]
+        return self._score_snapshot(df.iloc[-1])
+
+    def _score_snapshot(self, current) -> float:
+        """Оценка моментума по срезу индикаторов (строка DataFrame или dict)"""
         score = 0
 
         # RSI компонент
@@ -73,7 +88,7 @@ class SimpleMomentumStrategy(BaseStrategy):
             elif bb_position < -0.8:
                 score += 20  # Близко к нижней полосе
 
-        return max(min(score, 100), -100)  # Ограничение в диапазоне [-100, 100]
+        return float(max(min(score, 100), -100))  # Ограничение в диапазоне [-100, 100]
 
     def _get_recommendation(self, momentum_score: float, signals: Dict[str, Any]) -> str:
         """Получение рекомендации на основе анализа"""
@@ -0,0 +1,23 @@
+# utils/event_loop.py
+"""
+Выбор реализации event loop для точек входа процесса
+"""
+import asyncio
+import sys
+
+try:
+    import uvloop
+except ImportError:  # uvloop - опциональная зависимость, на Windows недоступен
+    uvloop = None
+
+
+def install_uvloop() -> bool:
+    """Установка uvloop как политики event loop до создания первого цикла
+
+    Возвращает True, если uvloop установлен; иначе остается стандартный asyncio.
+    """
+    if uvloop is None or sys.platform == 'win32':
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
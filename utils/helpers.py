@@ -21,6 +21,19 @@ def generate_position_id() -> str:
     return f"pos_{int(datetime.utcnow().timestamp() * 1000)}_{secrets.token_hex(4)}"
 
 
+def to_decimal(value: Any) -> Decimal:
+    """Приведение числа к Decimal без лишнего разбора строки
+
+    Decimal возвращается как есть, int и str конвертируются напрямую.
+    float проходит через repr(), чтобы не тащить двоичную погрешность.
+    """
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value)
+
+
 def round_price(price: Decimal, tick_size: Decimal) -> Decimal:
     """Округление цены до tick size"""
     return (price / tick_size).quantize(Decimal('1'), rounding=ROUND_DOWN) * tick_size
@@ -47,6 +60,11 @@ def format_percentage(value: float, decimals: int = 2) -> str:
     return f"{value:.{decimals}f}%"
 
 
+def format_duration_ms(duration_ms: int) -> str:
+    """Форматирование длительности в миллисекундах (ч:мм:сс)"""
+    return str(timedelta(milliseconds=duration_ms))
+
+
 def safe_divide(numerator: float, denominator: float, default: float = 0.0) -> float:
     """Безопасное деление"""
     return numerator / denominator if denominator != 0 else default
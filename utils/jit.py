@@ -0,0 +1,15 @@
+# utils/jit.py
+"""
+Опциональная JIT компиляция числовых ядер через numba
+"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba - опциональная зависимость
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Заглушка @njit - возвращает функцию без изменений"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
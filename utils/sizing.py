@@ -0,0 +1,37 @@
+# utils/sizing.py
+"""
+Числовые ядра расчета размера позиции и приоритета сигнала
+
+Функции принимают и возвращают только float/int, поэтому при наличии numba
+компилируются через @njit; без numba остаются обычными Python функциями.
+"""
+from utils.jit import njit
+
+
+@njit(cache=True, fastmath=True)
+def kelly_weight(confidence: float, win: float, loss: float, cost: float, risk_score: float,
+                 sigma_forecast: float, sigma_target: float, max_vol_weight: float,
+                 max_weight: float) -> float:
+    """Доля капитала в позицию по Келли, отображенная на [0, max_weight]
+
+    confidence - вероятность выигрыша, win/loss - доходность при тейк-профите
+    и стоп-лоссе, cost - издержки сделки (доли). Доля полного Келли бинарной
+    ставки за вычетом издержек (edge / win, не больше 1) масштабируется
+    таргетированием волатильности и риском сигнала; лимит max_weight
+    достигается только полным Келли при целевой волатильности.
+    """
+    edge = confidence * win - (1.0 - confidence) * loss - cost
+    if edge <= 0.0 or win <= 0.0 or sigma_forecast <= 0.0:
+        return 0.0
+
+    kelly = edge / win
+    w_vol = min(max_vol_weight, sigma_target / sigma_forecast)
+    w_risk = 1.0 - 0.5 * min(max(risk_score, 0.0), 1.0)
+    return max_weight * min(1.0, kelly * w_vol * w_risk)
+
+
+@njit(cache=True)
+def signal_priority(confidence: float, risk_score: float) -> int:
+    """Приоритет сигнала 1-10: бонус за уверенность, штраф за риск"""
+    priority = 5 + int(confidence * 3) - int(risk_score * 2)
+    return max(1, min(10, priority))